@@ -1,10 +1,30 @@
+import os
+
 import streamlit as st
-import pandas as pd
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+
+from buscador.arranque import marcar_interactivo, registro_compartido
+from buscador.metricas import METRICAS
+from buscador.motor import Consulta, Motor
+from buscador.resaltado import tramos_de_pagina
+from buscador.resultados import materializar, paginar, total_paginas
+
+# Opcional: sin streamlit-keyup no se ofrece la búsqueda mientras se escribe
+try:
+    from st_keyup import st_keyup
+except ImportError:
+    st_keyup = None
 
 # Configuración de la página
 st.set_page_config(page_title="Buscador de recursos e-stela", layout="wide")
 
+# Cada etapa del rerun se mide con METRICAS.tramo (ver buscador/metricas.py)
+METRICAS.iniciar_rerun()
+ADMIN_CLAVE = os.environ.get("ESTELA_ADMIN_CLAVE")
+# Pausa de tipeo (ms) antes de buscar mientras se escribe
+DEBOUNCE_MS = 250
+# URL pública de la API (buscador/api.py): si está, las descargas salen de ahí en streaming
+API_URL = os.environ.get("ESTELA_API_URL")
+
 # URL de imagen de fondo
 fondo_url = "https://lh3.googleusercontent.com/RgI1Jv1scZCNCly5WK2R6Ky4o9IWQXtYhDPW5r5YVVkXCI4x-mN0vqtCSoZdRMiHy-cehlnI_ICQ9TTtHPIK2T04AYPPDDDZ626_6Lacl_ipPmB6e84Zv0ROcVgTTd3b5dOscQ9euOvzpbPMVM_AeUBgZZoObtGrxUoQUS_ykzRWoiUbNMH4_Q=w1280"
 
@@ -50,29 +70,56 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_data():
-    CSV_URL = (
-        "https://docs.google.com/spreadsheets/d/e/"
-        "2PACX-1vQHZhdhfG9G5jCe2Tm5OpR6cY8gNk2aduQsJnaaVHR0sJg9VcCzjTNLDUVXzB8REA"
-        "/pub?output=csv"
-    )
-    df = pd.read_csv(CSV_URL, dtype=str)
-    df.columns = df.columns.str.strip().str.replace("\n", " ").str.replace("\r", " ")
-    return df
-
-df = load_data()
-df.columns = [c.strip() for c in df.columns]
-
-# Detectar columnas
-t_col = next(c for c in df.columns if "contenidos" in c.lower())
-rie_col = next(c for c in df.columns if "rie" in c.lower())
-grado_col = next(c for c in df.columns if c.lower() == "grado")
-espacio_col = next(c for c in df.columns if c.lower() == "espacio")
-unidad_col = next(c for c in df.columns if "unidad" in c.lower())
-
-df = df.rename(columns={t_col: "Contenido del Programa de Primaria"})
-t_col = "Contenido del Programa de Primaria"
+# Registro de conjuntos de datos compartido por todas las sesiones: cada conjunto
+# (con sus índices) se carga la primera vez que alguien lo elige y queda en
+# memoria hasta que el presupuesto obliga a descartarlo (LRU)
+@st.cache_resource
+def load_registro():
+    # Si se arrancó con python -m buscador.arranque, ya viene con datos e índices
+    registro = registro_compartido()
+    def estado_registro():
+        cache = registro.consultas.estadisticas()
+        return {
+            "estela_cache_consultas_aciertos": cache["aciertos"],
+            "estela_cache_consultas_fallos": cache["fallos"],
+            "estela_cache_consultas_bytes": cache["bytes"],
+            "estela_datasets_en_memoria_bytes": sum(b for _, b in registro.en_memoria()),
+        }
+    METRICAS.agregar_fuente(estado_registro)
+    # API JSON en el mismo proceso, sobre los mismos índices (ver buscador/api.py)
+    if os.environ.get("ESTELA_API_PUERTO"):
+        from buscador.api import iniciar_en_hilo
+        iniciar_en_hilo(registro, int(os.environ["ESTELA_API_PUERTO"]))
+    return registro
+
+registro = load_registro()
+nombres_datasets = registro.nombres()
+if st.session_state.get("dataset") not in nombres_datasets:
+    st.session_state.dataset = nombres_datasets[0]
+
+def cambiar_dataset():
+    # Las opciones de los filtros dependen del conjunto elegido
+    st.session_state.grados = []
+    st.session_state.espacios = []
+    st.session_state.unidades = []
+    st.session_state.libros = []
+    st.session_state.pag_desde = None
+    st.session_state.pag_hasta = None
+    st.session_state.tipos_recurso = []
+    st.session_state.recurso_term = ""
+    st.session_state.pagina = 0
+
+st.sidebar.selectbox("Mapa de recursos", nombres_datasets, key="dataset", on_change=cambiar_dataset)
+
+with METRICAS.tramo("carga"):
+    datos = registro.obtener(st.session_state.dataset)
+df = datos.df
+t_col = datos.t_col
+rie_col = datos.rie_col
+grado_col = datos.grado_col
+espacio_col = datos.espacio_col
+unidad_col = datos.unidad_col
+columnas_grilla = datos.columnas_grilla
 
 # Estado inicial de búsqueda y visibilidad de filtros
 if "search_clicked" not in st.session_state:
@@ -81,15 +128,69 @@ if "search_clicked" not in st.session_state:
 if "show_filters" not in st.session_state:
     st.session_state.show_filters = True  # mostrar filtros al inicio
 
+if "pagina" not in st.session_state:
+    st.session_state.pagina = 0
+
 def clear_filters():
     st.session_state.search_clicked = False
     st.session_state.by_content = False
     st.session_state.by_rie = False
     st.session_state.content_term = ""
     st.session_state.rie_term = ""
+    st.session_state.por_relevancia = False
+    st.session_state.difuso = False
     st.session_state.grados = []
     st.session_state.espacios = []
     st.session_state.unidades = []
+    st.session_state.libros = []
+    st.session_state.pag_desde = None
+    st.session_state.pag_hasta = None
+    st.session_state.tipos_recurso = []
+    st.session_state.recurso_term = ""
+    st.session_state.pagina = 0
+    # Los campos de búsqueda mientras se escribe guardan su texto en el navegador:
+    # con otra key se dibujan de nuevo, vacíos
+    st.session_state.limpiezas = st.session_state.get("limpiezas", 0) + 1
+
+def key_mientras_escribe(campo):
+    return f"{campo}_keyup{st.session_state.get('limpiezas', 0)}"
+
+# Mientras se escribe, el texto llega en el campo de keyup: se copia al de
+# siempre antes de armar la consulta
+mientras_escribe = st_keyup is not None and st.session_state.get("mientras_escribe", False)
+if mientras_escribe:
+    for campo in ("content_term", "rie_term"):
+        if key_mientras_escribe(campo) in st.session_state:
+            st.session_state[campo] = st.session_state[key_mientras_escribe(campo)]
+
+# --- FILTROS ACTIVOS ---
+
+# Se calculan antes de dibujar el sidebar para mostrar cuántas filas daría cada
+# opción. df es compartido y nunca se copia: los filtros producen máscaras y
+# posiciones de fila y solo se materializan las filas que se muestran
+# Cada sesión recuerda la última búsqueda de texto: la tecla siguiente parte de esas filas
+motor = Motor(datos, registro.consultas, st.session_state.dataset,
+              previos=st.session_state.setdefault("busquedas_previas", {}))
+estado = st.session_state
+consulta = Consulta.desde_dict({
+    "contenido": estado.get("content_term", "") if estado.get("by_content") else "",
+    "rie": estado.get("rie_term", "") if estado.get("by_rie") else "",
+    "difuso": bool(estado.get("difuso")),
+    "por_relevancia": bool(estado.get("por_relevancia")),
+    "grados": estado.get("grados", []),
+    "espacios": estado.get("espacios", []),
+    "unidades": estado.get("unidades", []),
+    "libros": estado.get("libros", []),
+    "pag_desde": estado.get("pag_desde"),
+    "pag_hasta": estado.get("pag_hasta"),
+    "tipos_recurso": estado.get("tipos_recurso", []),
+    "recurso": estado.get("recurso_term", ""),
+})
+
+def con_conteo(col):
+    """format_func que agrega a cada opción cuántas filas daría con los demás filtros."""
+    conteo = motor.conteos(consulta, col)
+    return lambda valor: f"{valor} ({conteo.get(valor, 0)})"
 
 # --- SIDEBAR ---
 
@@ -99,7 +200,7 @@ if st.session_state.show_filters:
     st.sidebar.markdown("<h2>Filtros de búsqueda</h2>", unsafe_allow_html=True)
 
     by_content = st.sidebar.checkbox(
-        "Buscar en los Contenidos del Programa de Educación Primaria",
+        f"Buscar en los Contenidos del Programa de Educación {datos.nivel}",
         key="by_content"
     )
     by_rie = st.sidebar.checkbox(
@@ -107,46 +208,94 @@ if st.session_state.show_filters:
         key="by_rie"
     )
 
-    content_term = (
-        st.sidebar.text_input(
-            "",
-            placeholder="Palabra o frase del programa",
-            key="content_term"
-        ) if by_content else ""
-    )
-
-    rie_term = (
-        st.sidebar.text_input(
-            "",
-            placeholder=f"Palabra o frase en {rie_col}",
-            key="rie_term"
-        ) if by_rie else ""
-    )
+    def campo_de_texto(campo, placeholder):
+        if mientras_escribe:
+            with st.sidebar:
+                return st_keyup(
+                    "",
+                    value=st.session_state.get(campo, ""),
+                    placeholder=placeholder,
+                    debounce=DEBOUNCE_MS,
+                    key=key_mientras_escribe(campo)
+                )
+        return st.sidebar.text_input("", placeholder=placeholder, key=campo)
+
+    content_term = campo_de_texto("content_term", "Palabra o frase del programa") if by_content else ""
+    rie_term = campo_de_texto("rie_term", f"Palabra o frase en {rie_col}") if by_rie else ""
+
+    # Con búsqueda de texto, los resultados pueden ordenarse por relevancia (BM25)
+    # y se pueden tolerar errores de tipeo
+    if by_content or by_rie:
+        if st_keyup is not None:
+            st.sidebar.checkbox(
+                "Buscar mientras escribo",
+                key="mientras_escribe",
+                help="Los resultados se actualizan al dejar de tipear, sin apretar Buscar."
+            )
+        st.sidebar.checkbox("Ordenar por relevancia", key="por_relevancia")
+        st.sidebar.checkbox(
+            "Tolerar errores de tipeo",
+            key="difuso",
+            help="Encuentra palabras parecidas (\"multiplicasion\" → multiplicación) "
+                 "y busca la frase del programa también en la Unidad Curricular."
+        )
 
+    # En cascada: Espacio y Unidad solo ofrecen valores que aparecen con lo ya
+    # elegido en los filtros de arriba (ver IndiceFacetas.opciones)
     grados = st.sidebar.multiselect(
         "Grado",
-        sorted(df[grado_col].dropna().unique()),
+        motor.opciones(consulta, grado_col),
+        format_func=con_conteo(grado_col),
         key="grados",
         placeholder="Elige una opción"
     )
     espacios = st.sidebar.multiselect(
         "Espacio",
-        sorted(df[espacio_col].dropna().unique()),
+        motor.opciones(consulta, espacio_col),
+        format_func=con_conteo(espacio_col),
         key="espacios",
         placeholder="Elige una opción"
     )
     unidades = st.sidebar.multiselect(
         "Unidad Curricular",
-        sorted(df[unidad_col].dropna().unique()),
+        motor.opciones(consulta, unidad_col),
+        format_func=con_conteo(unidad_col),
         key="unidades",
         placeholder="Elige una opción"
     )
+    if datos.libros is not None:
+        libros = st.sidebar.multiselect(
+            "Libro de texto",
+            datos.libros.titulos(),
+            key="libros",
+            placeholder="Elige una opción"
+        )
+        # El rango de páginas se aplica a los libros elegidos
+        if libros:
+            pcol1, pcol2 = st.sidebar.columns(2)
+            with pcol1:
+                st.number_input("Desde la página", min_value=1, step=1, value=None, key="pag_desde")
+            with pcol2:
+                st.number_input("Hasta la página", min_value=1, step=1, value=None, key="pag_hasta")
+
+    if datos.recursos.opciones():
+        st.sidebar.multiselect(
+            "Fichas y videolecciones",
+            datos.recursos.opciones(),
+            key="tipos_recurso",
+            placeholder="Elige un tipo"
+        )
+        st.sidebar.text_input(
+            "",
+            placeholder="Título de la ficha o videolección",
+            key="recurso_term"
+        )
 
     # Botones Buscar / Limpiar / Ocultar (todos con el mismo ancho de columna)
     bcol1, bcol2, bcol3 = st.sidebar.columns(3)
     with bcol1:
         st.button("🔍 Buscar", key="btn_buscar",
-                  on_click=lambda: st.session_state.update(search_clicked=True))
+                  on_click=lambda: st.session_state.update(search_clicked=True, pagina=0))
     with bcol2:
         st.button("🧹 Limpiar", key="btn_limpiar", on_click=clear_filters)
     with bcol3:
@@ -166,78 +315,188 @@ else:
     st.sidebar.button("📂 Mostrar filtros", key="btn_mostrar",
                       on_click=lambda: st.session_state.update(show_filters=True))
 
+def cerrar_rerun(**contexto):
+    """Registra los tiempos del rerun y, con ?admin=<ESTELA_ADMIN_CLAVE>, muestra el panel."""
+    tramos = METRICAS.terminar_rerun(dataset=st.session_state.dataset, **contexto)
+    marcar_interactivo()
+    if not ADMIN_CLAVE or st.query_params.get("admin") != ADMIN_CLAVE:
+        return
+    with st.expander("Panel de administración", expanded=True):
+        st.markdown("**Este rerun (ms)**")
+        st.json(tramos)
+        st.markdown("**Todos los reruns del proceso (ms)**")
+        st.dataframe([{"tramo": nombre, **valores} for nombre, valores in sorted(METRICAS.resumen().items())])
+        st.markdown("**Caché de consultas**")
+        st.json(registro.consultas.estadisticas())
+        st.markdown("**Conjuntos en memoria (MB)**")
+        st.json({nombre: round(b / 1e6, 1) for nombre, b in registro.en_memoria()})
+
 # --- LÓGICA DE BÚSQUEDA ---
 
+# Mientras se escribe no hace falta apretar Buscar
+if mientras_escribe and motor.busquedas(consulta):
+    st.session_state.search_clicked = True
+
 # Si nunca se hizo clic en Buscar, no mostramos resultados
 if not st.session_state.search_clicked:
+    cerrar_rerun()
     st.stop()
 
-data = df.copy()
-conds = []
-if st.session_state.get("by_content") and st.session_state.get("content_term"):
-    conds.append(
-        data[t_col].str.contains(
-            st.session_state.content_term,
-            case=False,
-            na=False
-        )
-    )
-if st.session_state.get("by_rie") and st.session_state.get("rie_term"):
-    conds.append(
-        data[rie_col].str.contains(
-            st.session_state.rie_term,
-            case=False,
-            na=False
-        )
-    )
-
-if conds:
-    mask = conds[0]
-    for c in conds[1:]:
-        mask |= c
-    data = data[mask]
-
-grados_sel = st.session_state.get("grados", [])
-espacios_sel = st.session_state.get("espacios", [])
-unidades_sel = st.session_state.get("unidades", [])
-
-if grados_sel:
-    data = data[data[grado_col].isin(grados_sel)]
-if espacios_sel:
-    data = data[data[espacio_col].isin(espacios_sel)]
-if unidades_sel:
-    data = data[data[unidad_col].isin(unidades_sel)]
-
-data_to_show = data.reset_index(drop=True)
+# Las búsquedas repetidas (de esta u otras sesiones) salen de la caché compartida
+filas = motor.filas(consulta)
+
+# --- RESULTADOS PAGINADOS ---
+
+# Si cambió la búsqueda se vuelve a la primera página
+firma = (
+    st.session_state.get("by_content"), st.session_state.get("content_term"),
+    st.session_state.get("by_rie"), st.session_state.get("rie_term"),
+    st.session_state.get("por_relevancia"), st.session_state.get("difuso"),
+    tuple(st.session_state.get("grados", [])),
+    tuple(st.session_state.get("espacios", [])),
+    tuple(st.session_state.get("unidades", [])),
+    tuple(st.session_state.get("libros", [])),
+    st.session_state.get("pag_desde"), st.session_state.get("pag_hasta"),
+    tuple(st.session_state.get("tipos_recurso", [])), st.session_state.get("recurso_term"),
+)
+if st.session_state.get("firma_busqueda") != firma:
+    st.session_state.firma_busqueda = firma
+    st.session_state.pagina = 0
+
+# Al navegador solo viaja la página actual: el tamaño de la respuesta no
+# depende de cuántas filas coinciden
+por_pagina = st.session_state.get("por_pagina", 25)
+filas_pagina, pagina = paginar(filas, st.session_state.pagina, por_pagina)
+st.session_state.pagina = pagina
+n_paginas = total_paginas(len(filas), por_pagina)
+
+def ir_a_pagina(nueva):
+    st.session_state.pagina = nueva
+
+with METRICAS.tramo("pagina"):
+    data_to_show = materializar(df, filas_pagina, columnas_grilla)
+
+# Dónde coincidió el texto buscado, solo en las celdas de esta página; la
+# grilla lo resalta con RESALTADO_JS (ver buscador/resaltado.py)
+with METRICAS.tramo("resaltado"):
+    resaltados = {}
+    for col, terminos in motor.resaltados(consulta).items():
+        if col in data_to_show.columns:
+            normalizados = datos.indices[col].textos
+            resaltados[col] = f"_resaltado_{col}"
+            data_to_show[resaltados[col]] = tramos_de_pagina(
+                data_to_show[col], [normalizados[i] for i in filas_pagina], terminos
+            )
+
+RESALTADO_JS = """
+class Resaltado {
+    init(params) {
+        this.eGui = document.createElement('span');
+        this.refresh(params);
+    }
+    getGui() {
+        return this.eGui;
+    }
+    refresh(params) {
+        // Texto y <mark> como nodos: el contenido de la celda nunca se interpreta como HTML
+        const texto = params.value == null ? '' : String(params.value);
+        const tramos = JSON.parse((params.data && params.data[params.campo]) || '[]');
+        this.eGui.replaceChildren();
+        let pos = 0;
+        for (const [inicio, fin] of tramos) {
+            this.eGui.append(texto.slice(pos, inicio));
+            const marca = document.createElement('mark');
+            marca.textContent = texto.slice(inicio, fin);
+            this.eGui.append(marca);
+            pos = fin;
+        }
+        this.eGui.append(texto.slice(pos));
+        return true;
+    }
+}
+"""
 
 if len(data_to_show) > 0:
-    gb = GridOptionsBuilder.from_dataframe(data_to_show)
-    gb.configure_pagination(paginationAutoPageSize=True)
-    gb.configure_default_column(
-        wrapText=True,
-        autoHeight=True,
-        wrapHeaderText=True,
-        autoHeaderHeight=True,
-        resizable=True
-    )
-    gb.configure_grid_options(
-        enableRangeSelection=True,
-        enableClipboard=True,
-        enableCellTextSelection=True,
-        domLayout='normal'
-    )
-    gb.configure_column("Contenido del Programa de Primaria", width=500)
-    grid_options = gb.build()
-
-    AgGrid(
-        data_to_show,
-        gridOptions=grid_options,
-        enable_enterprise_modules=False,
-        fit_columns_on_grid_load=True,
-        height=600,
-        selection_mode='single',
-        update_mode=GridUpdateMode.SELECTION_CHANGED,
-        allow_unsafe_jscode=True,
-    )
+    ncol1, ncol2, ncol3, ncol4, ncol5, ncol6 = st.columns([4, 1, 1, 1, 1, 2])
+    with ncol1:
+        st.markdown(f"**{len(filas)}** recursos encontrados · página {pagina + 1} de {n_paginas}")
+    with ncol2:
+        st.button("⏮", key="btn_primera", disabled=pagina == 0,
+                  on_click=ir_a_pagina, args=(0,))
+    with ncol3:
+        st.button("◀", key="btn_anterior", disabled=pagina == 0,
+                  on_click=ir_a_pagina, args=(pagina - 1,))
+    with ncol4:
+        st.button("▶", key="btn_siguiente", disabled=pagina >= n_paginas - 1,
+                  on_click=ir_a_pagina, args=(pagina + 1,))
+    with ncol5:
+        st.button("⏭", key="btn_ultima", disabled=pagina >= n_paginas - 1,
+                  on_click=ir_a_pagina, args=(n_paginas - 1,))
+    with ncol6:
+        st.selectbox("Filas por página", [25, 50, 100], key="por_pagina",
+                     label_visibility="collapsed", on_change=ir_a_pagina, args=(0,))
+
+    # Descarga de todas las filas encontradas, no solo de la página
+    dcol1, dcol2, _ = st.columns([1, 1, 6])
+    if API_URL:
+        from urllib.parse import urlencode
+        from buscador.motor import params_de_consulta
+        params = params_de_consulta(consulta, st.session_state.dataset)
+        with dcol1:
+            st.link_button("⬇ CSV", f"{API_URL}/export?{urlencode(params + [('formato', 'csv')])}")
+        with dcol2:
+            st.link_button("⬇ Excel", f"{API_URL}/export?{urlencode(params + [('formato', 'xlsx')])}")
+    else:
+        from buscador.exportar import FORMATOS, a_archivo
+        # Con una función, el archivo se arma recién cuando se hace clic y no frena el
+        # rerun. Se escribe de a bloques a un temporal que Streamlit lee una sola vez
+        for columna, formato, etiqueta in ((dcol1, "csv", "⬇ CSV"), (dcol2, "xlsx", "⬇ Excel")):
+            with columna:
+                st.download_button(
+                    etiqueta,
+                    lambda formato=formato: a_archivo(formato, df, filas, columnas_grilla),
+                    file_name=f"recursos.{formato}",
+                    mime=FORMATOS[formato],
+                    key=f"btn_{formato}",
+                    on_click="ignore",
+                )
+
+    with METRICAS.tramo("grilla"):
+        # st_aggrid se importa recién cuando hay resultados que mostrar: el
+        # arranque y los reruns sin búsqueda no pagan esa importación
+        from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, JsCode
+        gb = GridOptionsBuilder.from_dataframe(data_to_show)
+        gb.configure_default_column(
+            wrapText=True,
+            autoHeight=True,
+            wrapHeaderText=True,
+            autoHeaderHeight=True,
+            resizable=True
+        )
+        gb.configure_grid_options(
+            enableRangeSelection=True,
+            enableClipboard=True,
+            enableCellTextSelection=True,
+            domLayout='normal'
+        )
+        gb.configure_column(t_col, width=500)
+        for col, campo in resaltados.items():
+            gb.configure_column(campo, hide=True)
+            gb.configure_column(col, cellRenderer=JsCode(RESALTADO_JS), cellRendererParams={"campo": campo})
+        grid_options = gb.build()
+
+    with METRICAS.tramo("render"):
+        AgGrid(
+            data_to_show,
+            gridOptions=grid_options,
+            enable_enterprise_modules=False,
+            fit_columns_on_grid_load=True,
+            height=600,
+            selection_mode='single',
+            update_mode=GridUpdateMode.SELECTION_CHANGED,
+            allow_unsafe_jscode=True,
+        )
 else:
     st.write("No se encontraron recursos para los filtros seleccionados.")
+
+cerrar_rerun(filas=len(filas), filas_pagina=len(data_to_show))
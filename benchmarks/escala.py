@@ -0,0 +1,144 @@
+"""Carga, armado de índices, latencia de consultas y memoria según el tamaño de los datos.
+
+Genera conjuntos sintéticos de 1x, 10x, 100x y 1000x las filas de
+"BD MAPA RECURSOS.xlsx":
+
+* Grado, Espacio y Unidad se copian juntos de filas reales, para que las
+  combinaciones sigan siendo válidas.
+* Las demás columnas salen de filas al azar.
+* Los contenidos suman palabras inventadas, para que el vocabulario crezca
+  con el tamaño como en datos reales.
+
+Para cada tamaño se mide:
+
+* carga: leer el Parquet, como hace el snapshot;
+* índices: armar ``DatasetCargado``, que normaliza, categoriza y arma todos
+  los índices;
+* consultas: mediana y máximo de cada consulta con un ``motor.Motor`` nuevo y
+  sin caché, o sea, el costo completo de una consulta que nadie hizo antes;
+* memoria: ``DatasetCargado.nbytes`` y cuánto creció el pico de RSS del proceso;
+* tecleo: cada prefijo de algunas frases, como llegan al buscar mientras se
+  escribe, con ``buscar`` desde cero y con ``buscar_incremental`` partiendo de
+  la tecla anterior.
+
+Uso:
+    python benchmarks/escala.py [--factores 1 10 100 1000] [--repeticiones 20]
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from buscador.datasets import DatasetCargado  # noqa: E402
+from buscador.motor import Consulta, Motor  # noqa: E402
+from buscador.snapshot import Snapshot  # noqa: E402
+
+FACETAS = ["Grado", "Espacio", "Unidad curricular"]
+T_COL = "Contenidos Programa de Educación Básica Integrada"
+
+CONSULTAS = {
+    "sin filtros": Consulta(),
+    "grado": Consulta(grados=("3° grado",)),
+    "grado + unidad": Consulta(grados=("1° grado", "2° grado"), unidades=("Matemática ",)),
+    "palabra": Consulta(contenido="fracciones"),
+    "prefijo corto": Consulta(contenido="fra"),
+    "frase + grado": Consulta(contenido="de la", grados=("4° grado",)),
+    "relevancia": Consulta(contenido="numeración", rie="decena", por_relevancia=True),
+    "difuso": Consulta(contenido="multiplicasion", difuso=True),
+    "libro + páginas": Consulta(libros=("Gira molinete 1",), pag_desde=100, pag_hasta=130),
+    "ficha estratégica": Consulta(tipos_recurso=("Ficha estratégica",)),
+}
+
+TECLEO = ["fracciones equivalentes", "numeración hasta 1000", "lexema12"]
+
+
+def sintetico(base, factor, semilla=0):
+    rng = np.random.default_rng(semilla)
+    n = len(base) * factor
+    df = pd.DataFrame(index=pd.RangeIndex(n))
+    filas_facetas = rng.integers(0, len(base), n)
+    for col in base.columns:
+        filas = filas_facetas if col in FACETAS else rng.integers(0, len(base), n)
+        df[col] = base[col].to_numpy()[filas]
+    # Vocabulario que crece como sqrt(n) (ley de Heaps), con frecuencias tipo Zipf
+    vocabulario = np.array([f"lexema{i}" for i in range(int(200 * np.sqrt(factor)))])
+    extra = vocabulario[np.minimum(rng.zipf(1.3, n) - 1, len(vocabulario) - 1)]
+    df[T_COL] = df[T_COL].fillna("") + " " + extra
+    return df
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+def rss_pico_mb():
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--factores", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        base = pd.read_excel(os.path.join(RAIZ, "BD MAPA RECURSOS.xlsx"), dtype=str)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in args.factores:
+            ruta = os.path.join(tmp, f"x{factor}.parquet")
+            sintetico(base, factor).to_parquet(ruta, index=False)
+
+            rss_antes = rss_pico_mb()
+            df, t_carga = medir(lambda: pd.read_parquet(ruta))
+            snapshot = Snapshot(df, f"x{factor}", None, None, time.time(), "benchmark")
+            datos, t_indices = medir(lambda: DatasetCargado(snapshot, "Primaria"))
+
+            print(f"\n== {factor}x: {len(df)} filas ==")
+            print(f"carga {t_carga * 1e3:9.1f} ms   índices {t_indices * 1e3:9.1f} ms   "
+                  f"en memoria {datos.nbytes / 1e6:8.1f} MB   "
+                  f"RSS pico +{rss_pico_mb() - rss_antes:8.1f} MB")
+            print(f"{'consulta':20} {'filas':>9} {'mediana (ms)':>13} {'máx (ms)':>10}")
+            for nombre, consulta in CONSULTAS.items():
+                tiempos = []
+                for _ in range(args.repeticiones):
+                    filas, t = medir(lambda: Motor(datos).filas(consulta))
+                    tiempos.append(t * 1e3)
+                print(f"{nombre:20} {len(filas):>9} {statistics.median(tiempos):>13.2f} {max(tiempos):>10.2f}")
+
+            indice = datos.indices[datos.t_col]
+            # La lista de sufijos se arma una vez por snapshot, con la primera tecla
+            _, t_sufijos = medir(indice._sufijos)
+            print(f"{'tecleo':24} {'teclas':>6} {'buscar mediana/máx (ms)':>24} {'incremental mediana/máx (ms)':>29}"
+                  f"   (sufijos {t_sufijos * 1e3:.0f} ms)")
+            for frase in TECLEO:
+                completo, incremental, previo = [], [], None
+                for k in range(1, len(frase) + 1):
+                    _, t = medir(lambda: indice.buscar(frase[:k]))
+                    completo.append(t * 1e3)
+                    filas, t = medir(lambda: indice.buscar_incremental(frase[:k], previo))
+                    incremental.append(t * 1e3)
+                    previo = (frase[:k], filas)
+                print(f"{frase:24} {len(frase):>6} "
+                      f"{statistics.median(completo):>14.2f} / {max(completo):>7.2f} "
+                      f"{statistics.median(incremental):>19.2f} / {max(incremental):>7.2f}")
+            del datos, snapshot, df, indice
+
+
+if __name__ == "__main__":
+    main()
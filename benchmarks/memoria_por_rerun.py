@@ -0,0 +1,134 @@
+"""Memoria asignada por rerun: camino anterior (df.copy + cortes encadenados)
+contra el de la app (``Motor`` sobre los índices, paginado y solo la página
+mostrada materializada).
+
+El camino anterior después mandaba todas las filas encontradas a la grilla;
+eso no se cuenta. Sin filtros, el camino actual igual paga la lista de
+posiciones (8 bytes por fila), y el anterior un ``df.copy`` que no copia.
+
+Se suma el pico de ``tracemalloc`` (objetos de Python y arrays de numpy) y lo
+que se pidió al pool de Arrow, donde pandas guarda las columnas de texto y que
+``tracemalloc`` no ve.
+
+Uso:
+    python benchmarks/memoria_por_rerun.py [--repetir 1 10 50] [--por-pagina 25]
+
+Usa "BD MAPA RECURSOS.xlsx" como datos; ``--repetir`` concatena la hoja N
+veces (uno o más tamaños) para ver cómo crece cada camino. Con la hoja sola
+los dos caminos mueven pocos KB y la diferencia queda en el ruido.
+"""
+import argparse
+import io
+import os
+import sys
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from buscador.datasets import DatasetCargado  # noqa: E402
+from buscador.motor import Consulta, Motor  # noqa: E402
+from buscador.resultados import materializar, paginar  # noqa: E402
+from buscador.snapshot import Snapshot  # noqa: E402
+
+T_COL = "Contenidos Programa de Educación Básica Integrada"
+RIE_COL = "RIE"
+
+CONSULTAS = [
+    {"contenido": "fracciones"},
+    {"contenido": "numeración", "rie": "decena"},
+    {"grados": ["3° grado"]},
+    {"grados": ["1° grado", "2° grado"], "unidades": ["Matemática "]},
+    {"contenido": "a", "grados": ["4° grado"]},
+    {},
+]
+
+
+def camino_anterior(df, q):
+    data = df.copy()
+    conds = []
+    if q.get("contenido"):
+        conds.append(data[T_COL].str.contains(q["contenido"], case=False, na=False))
+    if q.get("rie"):
+        conds.append(data[RIE_COL].str.contains(q["rie"], case=False, na=False))
+    if conds:
+        mask = conds[0]
+        for c in conds[1:]:
+            mask |= c
+        data = data[mask]
+    if q.get("grados"):
+        data = data[data["Grado"].isin(q["grados"])]
+    if q.get("unidades"):
+        data = data[data["Unidad curricular"].isin(q["unidades"])]
+    return data.reset_index(drop=True)
+
+
+def camino_actual(datos, q, por_pagina):
+    """Lo que hace un rerun de la app: filas con ``Motor`` (sin caché) y una página."""
+    filas = Motor(datos).filas(Consulta.desde_dict(q))
+    filas_pagina, _ = paginar(filas, 0, por_pagina)
+    materializar(datos.df, filas_pagina, datos.columnas_grilla)
+    return filas
+
+
+def _asignado_arrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return 0
+    return pa.default_memory_pool().total_bytes_allocated()
+
+
+def medir(funcion):
+    arrow = _asignado_arrow()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    resultado = funcion()
+    pico = tracemalloc.get_traced_memory()[1] - antes
+    tracemalloc.stop()
+    return resultado, pico + _asignado_arrow() - arrow
+
+
+def leer_base():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return pd.read_excel(os.path.join(RAIZ, "BD MAPA RECURSOS.xlsx"), dtype=str)
+
+
+def medir_tamano(base, repetir, por_pagina):
+    # Ida y vuelta por Parquet, como el snapshot: columnas de un solo bloque
+    buffer = io.BytesIO()
+    pd.concat([base] * repetir, ignore_index=True).to_parquet(buffer, index=False)
+    crudo = pd.read_parquet(buffer)
+    datos = DatasetCargado(Snapshot(crudo.copy(), f"x{repetir}", None, None, 0.0, "disco"), "Primaria")
+
+    print(f"x{repetir}: {len(crudo)} filas, DataFrame en memoria: "
+          f"{crudo.memory_usage(deep=True).sum() / 1e6:.1f} MB\n")
+    # Las filas pueden diferir un poco: el camino nuevo además ignora tildes
+    print(f"{'consulta':55} {'filas':>13} {'antes (KB)':>11} {'ahora (KB)':>11}")
+    for q in CONSULTAS:
+        # Lo que se arma una sola vez por conjunto (p. ej. la primera máscara) no cuenta
+        camino_actual(datos, q, por_pagina)
+        viejo, pico_viejo = medir(lambda: camino_anterior(crudo, q))
+        nuevo, pico_nuevo = medir(lambda: camino_actual(datos, q, por_pagina))
+        filas = f"{len(viejo)}/{len(nuevo)}"
+        print(f"{str(q)[:55]:55} {filas:>13} {pico_viejo / 1e3:>11.1f} {pico_nuevo / 1e3:>11.1f}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repetir", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--por-pagina", type=int, default=25)
+    args = parser.parse_args()
+
+    base = leer_base()
+    for repetir in args.repetir:
+        medir_tamano(base, repetir, args.por_pagina)
+
+
+if __name__ == "__main__":
+    main()
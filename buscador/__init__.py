@@ -0,0 +1 @@
+"""Datos y búsqueda del buscador de recursos e-stela, sin dependencia de Streamlit."""
@@ -0,0 +1,182 @@
+"""API JSON de búsqueda, con la misma semántica que el sidebar de la app.
+
+Endpoints:
+
+* ``GET /datasets``: conjuntos disponibles.
+* ``GET /search``: filas que cumplen la consulta, paginadas.
+* ``GET /facets``: opciones de cada filtro, en cascada y con cantidades.
+* ``GET /row/{id}``: una fila por su posición en el snapshot.
+* ``GET /export``: todas las filas de la consulta como CSV o XLSX
+  (``formato``), en streaming (ver ``exportar``).
+* ``GET /metrics``: métricas en texto de Prometheus.
+
+Parámetros de consulta (los mismos campos que ``motor.Consulta``, ver
+``motor.consulta_desde_params``)::
+
+    dataset, contenido, rie, difuso, por_relevancia,
+    grado, espacio, unidad, libro, tipo    (se pueden repetir)
+    pag_desde, pag_hasta, recurso, pagina (desde 1), por_pagina, formato
+
+Las respuestas se comprimen con gzip si el cliente lo acepta, salvo el XLSX,
+que ya viene comprimido.
+
+Para correrla sola (importar el módulo no carga nada: el registro se crea
+recién en ``crear_app``)::
+
+    uvicorn --factory buscador.api:crear_app --port 8000
+
+Otra opción es levantarla dentro del proceso de Streamlit con
+``ESTELA_API_PUERTO``: así comparte el registro de conjuntos y los índices
+ya cargados (ver ``iniciar_en_hilo``).
+"""
+import threading
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from .arranque import registro_compartido
+from .exportar import FORMATOS, en_bloques
+from .metricas import METRICAS
+from .motor import Motor, ParametroInvalido, consulta_desde_params, entero_de_params
+from .resultados import materializar, paginar, total_paginas
+
+POR_PAGINA = 25
+POR_PAGINA_MAXIMO = 200
+
+
+class ErrorConsulta(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _registros(df, filas, columnas):
+    """Filas como dicts listos para JSON (sin NaN), con su posición como ``id``."""
+    data = materializar(df, filas, columnas).astype(object)
+    data = data.where(data.notna(), None)
+    return [{"id": int(fila), **registro} for fila, registro in zip(filas, data.to_dict("records"))]
+
+
+def crear_app(registro=None):
+    registro = registro or registro_compartido()
+
+    def motor_de(params):
+        nombres = registro.nombres()
+        nombre = params.get("dataset") or nombres[0]
+        if nombre not in nombres:
+            raise ErrorConsulta(404, f"No existe el conjunto '{nombre}'")
+        with METRICAS.tramo("carga"):
+            datos = registro.obtener(nombre)
+        return nombre, Motor(datos, registro.consultas, nombre)
+
+    def buscar(params):
+        nombre, motor = motor_de(params)
+        consulta = consulta_desde_params(params)
+        por_pagina = min(max(entero_de_params(params, "por_pagina", POR_PAGINA), 1), POR_PAGINA_MAXIMO)
+        filas = motor.filas(consulta)
+        filas_pagina, pagina = paginar(filas, entero_de_params(params, "pagina", 1) - 1, por_pagina)
+        datos = motor.datos
+        return {
+            "dataset": nombre,
+            "version": datos.version,
+            "total": len(filas),
+            "pagina": pagina + 1,
+            "paginas": total_paginas(len(filas), por_pagina),
+            "por_pagina": por_pagina,
+            "resultados": _registros(datos.df, filas_pagina, datos.columnas_grilla),
+        }
+
+    def facetas(params):
+        nombre, motor = motor_de(params)
+        consulta = consulta_desde_params(params)
+        datos = motor.datos
+        respuesta = {"dataset": nombre, "version": datos.version}
+        for clave, col in (("grado", datos.grado_col), ("espacio", datos.espacio_col), ("unidad", datos.unidad_col)):
+            conteo = motor.conteos(consulta, col)
+            respuesta[clave] = [{"valor": v, "filas": conteo.get(v, 0)} for v in motor.opciones(consulta, col)]
+        respuesta["libro"] = datos.libros.titulos() if datos.libros is not None else []
+        respuesta["tipo"] = datos.recursos.opciones()
+        return respuesta
+
+    def fila(params, id_fila):
+        nombre, motor = motor_de(params)
+        datos = motor.datos
+        if not 0 <= id_fila < len(datos.df):
+            raise ErrorConsulta(404, f"No existe la fila {id_fila}")
+        registro_fila = _registros(datos.df, np.array([id_fila]), datos.columnas_grilla)[0]
+        return {"dataset": nombre, "version": datos.version, **registro_fila}
+
+    def endpoint(funcion, tramo):
+        async def manejar(request):
+            # El trabajo es de CPU y la primera carga de un conjunto puede tardar:
+            # se hace en el pool de hilos para no frenar el event loop
+            def correr():
+                with METRICAS.tramo(tramo):
+                    return funcion(request.query_params, **request.path_params)
+            try:
+                return JSONResponse(await run_in_threadpool(correr))
+            except ErrorConsulta as e:
+                return JSONResponse({"error": str(e)}, status_code=e.estado)
+            except ParametroInvalido as e:
+                return JSONResponse({"error": str(e)}, status_code=400)
+        return manejar
+
+    async def exportar(request):
+        params = request.query_params
+        formato = params.get("formato", "csv")
+        if formato not in FORMATOS:
+            return JSONResponse({"error": f"'formato' tiene que ser uno de {', '.join(FORMATOS)}"}, status_code=400)
+
+        def preparar():
+            with METRICAS.tramo("api_export"):
+                _, motor = motor_de(params)
+                return motor.datos, motor.filas(consulta_desde_params(params))
+        try:
+            datos, filas = await run_in_threadpool(preparar)
+        except ErrorConsulta as e:
+            return JSONResponse({"error": str(e)}, status_code=e.estado)
+        except ParametroInvalido as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        # El generador es sincrónico: Starlette lo recorre en el pool de hilos
+        return StreamingResponse(
+            en_bloques(formato, datos.df, filas, datos.columnas_grilla),
+            media_type=FORMATOS[formato],
+            headers={"Content-Disposition": f'attachment; filename="recursos.{formato}"'},
+        )
+
+    async def datasets(request):
+        return JSONResponse({"datasets": registro.nombres()})
+
+    async def metrics(request):
+        return PlainTextResponse(METRICAS.prometheus(), media_type="text/plain; version=0.0.4")
+
+    return Starlette(
+        routes=[
+            Route("/datasets", datasets),
+            Route("/search", endpoint(buscar, "api_search")),
+            Route("/facets", endpoint(facetas, "api_facets")),
+            Route("/row/{id_fila:int}", endpoint(fila, "api_row")),
+            Route("/export", exportar),
+            Route("/metrics", metrics),
+        ],
+        # XLSX ya es un zip: comprimirlo de nuevo solo gasta CPU
+        middleware=[Middleware(GZipMiddleware, minimum_size=1000,
+                               exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + (FORMATOS["xlsx"],))],
+    )
+
+
+def iniciar_en_hilo(registro, puerto, host="0.0.0.0"):
+    """Levanta la API en un hilo del proceso actual, sobre ``registro``."""
+    import uvicorn
+
+    # Fuera del hilo principal uvicorn no toca las señales: las sigue manejando Streamlit
+    servidor = uvicorn.Server(uvicorn.Config(crear_app(registro), host=host, port=puerto, log_level="warning"))
+    hilo = threading.Thread(target=servidor.run, name="estela-api", daemon=True)
+    hilo.start()
+    return servidor
+
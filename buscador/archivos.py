@@ -0,0 +1,27 @@
+"""Escritura atómica y metadatos JSON de la caché en disco (snapshot y consolidado)."""
+import json
+import os
+
+
+def leer_meta(ruta_meta):
+    """El JSON de ``ruta_meta``, o ``None`` si no existe o está roto."""
+    try:
+        with open(ruta_meta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def escribir_atomico(ruta, escribir):
+    """Llama a ``escribir(tmp)`` y reemplaza ``ruta`` con el temporal."""
+    # Se escribe a un temporal y se reemplaza, así nunca queda un archivo a medias
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    escribir(tmp)
+    os.replace(tmp, ruta)
+
+
+def guardar_meta(ruta_meta, meta):
+    def escribir(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    escribir_atomico(ruta_meta, escribir)
@@ -0,0 +1,142 @@
+"""Arranque en frío: precarga de datos antes de aceptar tráfico.
+
+Con ``streamlit run`` a secas, el primer usuario después de cada reinicio
+paga todo dentro de su rerun: importar pandas, bajar la planilla, detectar
+columnas y armar los índices. Este módulo lanza Streamlit después de hacer
+ese trabajo:
+
+    python -m buscador.arranque Mapa_recursos_estela.py --server.port=$PORT
+
+1. Importa lo pesado, consolida los libros .xlsx (``ingesta.consolidar``, que
+   no hace nada si no cambiaron) y carga los conjuntos de ``ESTELA_PRECARGAR``
+   (nombres separados por ``;``; por defecto, el primero). Queda un
+   ``RegistroDatasets`` que la app toma con ``registro_compartido``.
+2. Escribe ``ESTELA_LISTO_ARCHIVO``, si está definido, con los tiempos de
+   cada paso. Es la señal de listo para un healthcheck.
+3. Arranca Streamlit en el mismo proceso. El puerto se abre recién ahora, así
+   que el router de la plataforma no manda tráfico antes.
+
+El tiempo hasta la primera interacción (desde que arrancó el proceso hasta
+que terminó el primer rerun) queda en el log y en el tramo
+``hasta_interactivo`` de las métricas (ver ``marcar_interactivo``).
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from .metricas import METRICAS
+
+log = logging.getLogger(__name__)
+
+PRECARGAR = os.environ.get("ESTELA_PRECARGAR")
+LISTO_ARCHIVO = os.environ.get("ESTELA_LISTO_ARCHIVO")
+
+_IMPORTADO = time.time()
+_registro = None
+_lock = threading.Lock()
+_interactivo = False
+
+
+def inicio_del_proceso():
+    """Momento (``time.time()``) en que arrancó el proceso."""
+    try:
+        # /proc/self/stat: el campo 22 es el arranque en ticks desde el boot
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        # Fuera de Linux: desde que se importó este módulo
+        return _IMPORTADO
+
+
+def registro_compartido():
+    """El ``RegistroDatasets`` del proceso; si no se precargó, se crea vacío.
+
+    Viene con el refresco en segundo plano andando.
+    """
+    global _registro
+    with _lock:
+        if _registro is None:
+            from .datasets import RegistroDatasets, datasets_por_defecto
+            _registro = RegistroDatasets(datasets_por_defecto())
+            _registro.iniciar_refresco()
+        return _registro
+
+
+def precalentar(nombres=None):
+    """Importa, consolida los libros, carga y arma índices de ``nombres``; devuelve
+    los tiempos en ms."""
+    tiempos = {}
+    inicio = time.perf_counter()
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    tiempos["importaciones"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    try:
+        # Primaria/Secundaria 2025 y los Espacio solo aparecen con el consolidado.
+        # Se arma acá (la fase release de la plataforma no deja archivos en los
+        # dynos); si los libros no cambiaron, solo se calcula su hash
+        from .ingesta import consolidar
+        consolidar(salida=log.info)
+    except Exception:
+        log.exception("No se pudo consolidar los libros")
+    tiempos["consolidado"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    registro = registro_compartido()
+    nombres = nombres or registro.nombres()[:1]
+    for nombre in nombres:
+        try:
+            registro.obtener(nombre)
+        except Exception:
+            # Sin datos se arranca igual: se cargan en el primer rerun, como antes
+            log.exception("No se pudo precargar %s", nombre)
+    tiempos["datos"] = time.perf_counter() - inicio
+
+    for paso, segundos in tiempos.items():
+        METRICAS.observar(f"arranque_{paso}", segundos)
+    tiempos_ms = {paso: round(s * 1e3, 1) for paso, s in tiempos.items()}
+    tiempos_ms["desde_inicio"] = round((time.time() - inicio_del_proceso()) * 1e3, 1)
+    log.info("%s", json.dumps({"evento": "precarga", "datasets": nombres, "tiempos_ms": tiempos_ms},
+                              ensure_ascii=False))
+    return tiempos_ms
+
+
+def marcar_interactivo():
+    """Al terminar el primer rerun del proceso, registra cuánto tardó desde el arranque."""
+    global _interactivo
+    with _lock:
+        if _interactivo:
+            return
+        _interactivo = True
+    segundos = time.time() - inicio_del_proceso()
+    METRICAS.observar("hasta_interactivo", segundos)
+    log.info("%s", json.dumps({"evento": "interactivo", "desde_inicio_ms": round(segundos * 1e3, 1)}))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO)
+    nombres = [n.strip() for n in PRECARGAR.split(";") if n.strip()] if PRECARGAR else None
+    if LISTO_ARCHIVO and os.path.exists(LISTO_ARCHIVO):
+        os.remove(LISTO_ARCHIVO)
+    tiempos = precalentar(nombres)
+    if LISTO_ARCHIVO:
+        with open(LISTO_ARCHIVO, "w", encoding="utf-8") as f:
+            json.dump(tiempos, f)
+
+    from streamlit.web import cli
+    return cli.main(["run", *argv], prog_name="streamlit")
+
+
+if __name__ == "__main__":
+    # Con -m este archivo corre como __main__: se usa el módulo importado, que
+    # es el mismo que ve la app
+    from buscador.arranque import main as _main
+    sys.exit(_main())
@@ -0,0 +1,91 @@
+"""Caché de resultados de búsqueda compartida por todas las sesiones.
+
+Muchas docentes hacen las mismas búsquedas (el mismo grado y el mismo
+Espacio). El resultado, un array de posiciones de fila, se guarda con una
+clave armada con la consulta normalizada y la versión del conjunto. Cuando
+los datos cambian, cambia la versión y las entradas viejas dejan de usarse.
+El registro además las descarta enseguida (``descartar_version``).
+
+Los arrays guardados son de solo lectura porque los comparten todas las
+sesiones.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from .normalizacion import normalizar
+
+PRESUPUESTO_MB = float(os.environ.get("ESTELA_CACHE_CONSULTAS_MB", "32"))
+
+
+def clave_de_consulta(nombre, version, textos=(), opciones=(), filtros=None):
+    """Clave estable para una consulta.
+
+    ``textos`` son pares (columna, término) y se normalizan, así que "Fracción"
+    y "FRACCION" comparten entrada. Los espacios se conservan: el término se
+    busca como subcadena y "fraccion " no encuentra lo mismo que "fraccion".
+    ``opciones`` son valores simples
+    (banderas, páginas). ``filtros`` es un dict columna -> valores elegidos y
+    no depende del orden de la selección.
+    """
+    return (
+        nombre,
+        version,
+        tuple((col, normalizar(t)) for col, t in textos),
+        tuple(opciones),
+        tuple(sorted((col, tuple(sorted(v))) for col, v in (filtros or {}).items() if v)),
+    )
+
+
+class CacheConsultas:
+    """LRU de arrays de posiciones, acotada por memoria."""
+
+    def __init__(self, presupuesto_mb=PRESUPUESTO_MB):
+        self.presupuesto = int(presupuesto_mb * 1024 * 1024)
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, calcular):
+        """Resultado guardado para ``clave``, o ``calcular()`` si no está."""
+        with self._lock:
+            resultado = self._entradas.get(clave)
+            if resultado is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return resultado
+            self.fallos += 1
+        # Se calcula fuera del lock: dos sesiones con la misma consulta nueva
+        # pueden calcularla a la vez, pero ninguna frena a las demás
+        resultado = calcular()
+        resultado.setflags(write=False)
+        with self._lock:
+            if clave not in self._entradas:
+                self._entradas[clave] = resultado
+                self._bytes += resultado.nbytes
+                self._recortar()
+        return resultado
+
+    def _recortar(self):
+        while self._entradas and self._bytes > self.presupuesto:
+            _, viejo = self._entradas.popitem(last=False)
+            self._bytes -= viejo.nbytes
+
+    def descartar_version(self, nombre, version):
+        """Saca las entradas de una versión reemplazada de un conjunto."""
+        with self._lock:
+            for clave in [c for c in self._entradas if c[:2] == (nombre, version)]:
+                self._bytes -= self._entradas.pop(clave).nbytes
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+            }
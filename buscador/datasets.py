@@ -0,0 +1,263 @@
+"""Conjuntos de datos que se pueden elegir en la app y su carga perezosa.
+
+Cada conjunto (la planilla publicada, Primaria y Secundaria 2025, cada libro
+"Espacio ...") se carga con sus índices recién cuando alguien lo elige y
+queda en memoria mientras entre en el presupuesto ``ESTELA_MEMORIA_MB``; si no
+entra, se descarta el que se usó hace más tiempo. Quien consulta un nivel
+nunca paga la carga ni la memoria del otro.
+
+Los conjuntos que se revalidan (la planilla publicada) se refrescan en un
+hilo aparte (``RegistroDatasets.iniciar_refresco``): el conjunto nuevo se arma
+fuera de las consultas y después se reemplaza de una vez. Quien ya tenía el
+anterior termina con ese; nadie espera un refresco. El nuevo se arma a partir
+del anterior: solo se vuelven a procesar las filas que cambiaron (ver
+``huellas``).
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+from .consultas import CacheConsultas
+from .facetas import IndiceFacetas, a_categorias
+from .huellas import emparejar, huellas
+from .indice_texto import IndiceTexto
+from .libros import IndiceLibros
+from .metricas import METRICAS
+from .recursos import IndiceRecursos
+from .ingesta import RAIZ, cargar_consolidado, hay_consolidado, libros_por_defecto, nivel_de
+from .normalizacion import agregar_columnas_normalizadas, columna_normalizada, columnas_visibles
+from .snapshot import REVALIDAR_CADA, cargar_snapshot
+
+log = logging.getLogger(__name__)
+
+PRESUPUESTO_MB = int(os.environ.get("ESTELA_MEMORIA_MB", "512"))
+# Si cambió más que esta fracción de las filas, se rearma todo en vez de actualizar
+MAXIMO_CAMBIOS = 0.5
+
+
+@dataclass(frozen=True)
+class Dataset:
+    nombre: str
+    cargar: Callable                  # () -> Snapshot; con revalidar, acepta max_edad
+    nivel: str                        # "Primaria" o "Secundaria"
+    disponible: Callable = lambda: True
+    revalidar: bool = False           # volver a consultar la fuente cada REVALIDAR_CADA s
+
+
+def datasets_por_defecto(raiz=RAIZ):
+    datasets = [
+        Dataset(
+            "Primaria (planilla publicada)",
+            cargar_snapshot,
+            "Primaria",
+            revalidar=True,
+        )
+    ]
+    # Primero los mapas por nivel y después los libros de cada Espacio
+    for ruta in sorted(libros_por_defecto(raiz), key=lambda r: not os.path.basename(r).startswith("Mapa ")):
+        archivo = os.path.splitext(os.path.basename(ruta))[0]
+        nombre = archivo[len("Mapa "):] if archivo.startswith("Mapa ") else archivo
+        datasets.append(Dataset(
+            nombre,
+            lambda archivo=archivo: cargar_consolidado(archivo=archivo),
+            nivel_de(ruta),
+            disponible=hay_consolidado,
+        ))
+    return datasets
+
+
+def detectar_columnas(columnas):
+    """Nombres de las columnas clave según los encabezados de la planilla."""
+    return {
+        "contenido": next(c for c in columnas if "contenidos" in c.lower()),
+        "rie": next(c for c in columnas if "rie" in c.lower()),
+        "grado": next(c for c in columnas if c.lower() == "grado"),
+        "espacio": next(c for c in columnas if c.lower() == "espacio"),
+        "unidad": next(c for c in columnas if "unidad" in c.lower()),
+        "libros": next((c for c in columnas if "libros" in c.lower()), None),
+        "fichas": next((c for c in columnas if c.lower().startswith("fichas")), None),
+        "videos": next((c for c in columnas if "videolecciones" in c.lower()), None),
+    }
+
+
+class DatasetCargado:
+    """Un snapshot listo para buscar: columnas normalizadas, categorías e índices.
+
+    Es de solo lectura; todas las sesiones comparten la misma instancia.
+    """
+
+    def __init__(self, snapshot, nivel, anterior=None):
+        df = snapshot.df.rename(columns=lambda c: c.strip())
+        with METRICAS.tramo("columnas"):
+            cols = detectar_columnas(df.columns)
+        self.nivel = nivel
+        self.t_col = f"Contenido del Programa de {nivel}"
+        df = df.rename(columns={cols["contenido"]: self.t_col})
+
+        self.version = snapshot.version
+        self.rie_col = cols["rie"]
+        self.grado_col = cols["grado"]
+        self.espacio_col = cols["espacio"]
+        self.unidad_col = cols["unidad"]
+        self.libros_col = cols["libros"]
+        self.columnas_fuente = list(snapshot.df.columns)
+
+        # Con el conjunto anterior a mano, solo se procesan las filas que cambiaron
+        with METRICAS.tramo("huellas"):
+            self.huellas = huellas(snapshot.df)
+            origen = self._origen(anterior, nivel)
+        self.cambios = None if origen is None else (
+            int((origen < 0).sum()), int(len(anterior.df) - (origen >= 0).sum())
+        )
+        textos = (self.t_col, self.rie_col, self.unidad_col)
+        with METRICAS.tramo("indices"):
+            df = agregar_columnas_normalizadas(
+                df, textos, None if origen is None else anterior.df, origen
+            )
+            self.df = a_categorias(df, (self.grado_col, self.espacio_col, self.unidad_col))
+            # Las facetas no tienen trabajo por fila en Python: se arman siempre de cero
+            self.facetas = IndiceFacetas(df, (self.grado_col, self.espacio_col, self.unidad_col))
+            if origen is None:
+                self.indices = {col: IndiceTexto(df[columna_normalizada(col)]) for col in textos}
+                # Libros y páginas citados en "Libros de texto", si la planilla tiene esa columna
+                self.libros = IndiceLibros(df[self.libros_col]) if self.libros_col else None
+                # Fichas (con su tipo) y videolecciones citadas en cada fila
+                self.recursos = IndiceRecursos(df, cols["fichas"], cols["videos"])
+            else:
+                self.indices = {
+                    col: anterior.indices[col].actualizar(df[columna_normalizada(col)], origen)
+                    for col in textos
+                }
+                self.libros = anterior.libros.actualizar(df[self.libros_col], origen) if self.libros_col else None
+                self.recursos = anterior.recursos.actualizar(df, origen)
+        # Posiciones de las columnas que ve el usuario (sin las columnas sombra)
+        self.columnas_grilla = df.columns.get_indexer(columnas_visibles(df))
+        self.nbytes = (
+            int(df.memory_usage(deep=True).sum())
+            + sum(ix.nbytes for ix in self.indices.values())
+            + self.facetas.nbytes
+            + (self.libros.nbytes if self.libros else 0)
+            + self.recursos.nbytes
+            + self.huellas.nbytes
+        )
+
+    def _origen(self, anterior, nivel):
+        """``origen`` de cada fila respecto de ``anterior`` (ver ``huellas``), o None
+        si conviene armar todo de cero."""
+        if anterior is None or anterior.nivel != nivel or anterior.columnas_fuente != self.columnas_fuente:
+            return None
+        origen = emparejar(anterior.huellas, self.huellas)
+        if (origen < 0).mean() > MAXIMO_CAMBIOS:
+            return None
+        return origen
+
+
+class RegistroDatasets:
+    """Caché LRU de conjuntos cargados, acotada por memoria."""
+
+    def __init__(self, datasets, presupuesto_mb=PRESUPUESTO_MB):
+        self.datasets = {d.nombre: d for d in datasets}
+        self.presupuesto = presupuesto_mb * 1024 * 1024
+        self._cargados = OrderedDict()
+        self._lock = threading.Lock()
+        # Un lock por conjunto: dos sesiones que piden el mismo esperan una sola carga
+        self._cargando = {nombre: threading.Lock() for nombre in self.datasets}
+        # Resultados de búsqueda compartidos, con la versión de cada conjunto en la clave
+        self.consultas = CacheConsultas()
+        self._refresco = None
+        self._detener = threading.Event()
+
+    def nombres(self):
+        return [d.nombre for d in self.datasets.values() if d.disponible()]
+
+    def obtener(self, nombre):
+        """El conjunto cargado; solo la primera vez espera la carga."""
+        with self._lock:
+            cargado = self._cargados.get(nombre)
+            if cargado is not None:
+                self._cargados.move_to_end(nombre)
+                return cargado
+        dataset = self.datasets[nombre]
+        with self._cargando[nombre]:
+            with self._lock:
+                cargado = self._cargados.get(nombre)
+            if cargado is None:
+                with METRICAS.tramo("fuente"):
+                    snapshot = dataset.cargar()
+                cargado = DatasetCargado(snapshot, dataset.nivel)
+                with self._lock:
+                    self._cargados[nombre] = cargado
+                    self._cargados.move_to_end(nombre)
+                    self._recortar()
+        return cargado
+
+    def refrescar(self, nombre):
+        """Revalida la fuente de un conjunto cargado y, si cambió, lo reemplaza.
+
+        El ``DatasetCargado`` nuevo se arma sin tocar el actual, que sigue
+        sirviendo consultas, y se instala con una sola asignación bajo el lock.
+        Devuelve True si se reemplazó.
+        """
+        dataset = self.datasets[nombre]
+        with self._cargando[nombre]:
+            with self._lock:
+                actual = self._cargados.get(nombre)
+            if actual is None:
+                # No está en memoria: se cargará fresco cuando alguien lo pida
+                return False
+            with METRICAS.tramo("refresco"):
+                with METRICAS.tramo("fuente"):
+                    # El hilo ya decide cada cuánto se refresca: la fuente se
+                    # consulta siempre, sin esperar a que venza la copia en disco
+                    snapshot = dataset.cargar(max_edad=0) if dataset.revalidar else dataset.cargar()
+                if snapshot.version == actual.version:
+                    return False
+                nuevo = DatasetCargado(snapshot, dataset.nivel, anterior=actual)
+            with self._lock:
+                # Si se descartó mientras se armaba, no se vuelve a meter
+                if nombre not in self._cargados:
+                    return False
+                self._cargados[nombre] = nuevo
+                self._recortar()
+        self.consultas.descartar_version(nombre, actual.version)
+        log.info("%s: versión %s reemplaza a %s (filas nuevas o editadas, borradas: %s)",
+                 nombre, nuevo.version, actual.version, nuevo.cambios)
+        return True
+
+    def iniciar_refresco(self, cada=REVALIDAR_CADA):
+        """Hilo que cada ``cada`` segundos refresca los conjuntos cargados que se revalidan."""
+        if self._refresco is not None:
+            return self._refresco
+
+        def ciclo():
+            while not self._detener.wait(cada):
+                for nombre, _ in self.en_memoria():
+                    if not self.datasets[nombre].revalidar:
+                        continue
+                    try:
+                        self.refrescar(nombre)
+                    except Exception:
+                        # La fuente puede fallar: se sigue con la versión actual
+                        log.exception("No se pudo refrescar %s", nombre)
+
+        self._refresco = threading.Thread(target=ciclo, name="estela-refresco", daemon=True)
+        self._refresco.start()
+        return self._refresco
+
+    def detener_refresco(self):
+        self._detener.set()
+        if self._refresco is not None:
+            self._refresco.join()
+            self._refresco = None
+
+    def _recortar(self):
+        # El recién usado (al final) nunca se descarta, aunque solo él exceda el presupuesto
+        while len(self._cargados) > 1 and sum(c.nbytes for c in self._cargados.values()) > self.presupuesto:
+            self._cargados.popitem(last=False)
+
+    def en_memoria(self):
+        with self._lock:
+            return [(nombre, c.nbytes) for nombre, c in self._cargados.items()]
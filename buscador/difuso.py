@@ -0,0 +1,68 @@
+"""Búsqueda tolerante a errores de tipeo con un índice de trigramas.
+
+Los candidatos para una palabra mal escrita ("multiplicasion") salen del
+índice de trigramas de caracteres del vocabulario: solo los tokens que
+comparten suficientes trigramas con ella. La distancia de edición se calcula
+únicamente sobre esos candidatos, nunca sobre todas las celdas.
+"""
+import numpy as np
+
+_VACIO = np.empty(0, dtype=np.int32)
+
+
+def trigramas(palabra):
+    p = f"  {palabra} "
+    return {p[i:i + 3] for i in range(len(p) - 2)}
+
+
+def max_errores(palabra):
+    """Errores aceptados según el largo: palabras cortas tienen que ser exactas."""
+    if len(palabra) <= 3:
+        return 0
+    if len(palabra) <= 6:
+        return 1
+    return 2
+
+
+def distancia(a, b, tope):
+    """Distancia de Levenshtein entre ``a`` y ``b``, o ``tope + 1`` si la supera."""
+    if abs(len(a) - len(b)) > tope:
+        return tope + 1
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        actual = [i]
+        for j, cb in enumerate(b, 1):
+            actual.append(min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + (ca != cb)))
+        if min(actual) > tope:
+            return tope + 1
+        anterior = actual
+    return anterior[-1]
+
+
+class IndiceTrigramas:
+    def __init__(self, vocabulario):
+        self.vocabulario = vocabulario
+        postings = {}
+        for tid, token in enumerate(vocabulario):
+            for t in trigramas(token):
+                postings.setdefault(t, []).append(tid)
+        self.postings = {t: np.array(ids, dtype=np.int32) for t, ids in postings.items()}
+
+    @property
+    def nbytes(self):
+        return sum(p.nbytes for p in self.postings.values())
+
+    def similares(self, palabra, errores=None):
+        """Ids de los tokens a distancia de edición ``<= errores`` de ``palabra``."""
+        errores = max_errores(palabra) if errores is None else errores
+        propios = trigramas(palabra)
+        listas = [self.postings[t] for t in propios if t in self.postings]
+        if not listas:
+            return _VACIO
+        ids, compartidos = np.unique(np.concatenate(listas), return_counts=True)
+        # Cada edición cambia a lo sumo 3 trigramas
+        candidatos = ids[compartidos >= len(propios) - 3 * errores]
+        return np.array(
+            [tid for tid in candidatos if distancia(palabra, self.vocabulario[tid], errores) <= errores],
+            dtype=np.int32,
+        )
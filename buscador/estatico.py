@@ -0,0 +1,111 @@
+"""Exporta los conjuntos a un sitio estático que busca en el navegador.
+
+Para cada conjunto se escribe un JSON con las filas visibles y los índices ya
+armados:
+
+* el vocabulario y las listas de filas de cada columna de texto, como
+  enteros little-endian en base64;
+* un bitmap por valor de cada faceta.
+
+``index.html`` carga ese JSON y resuelve las consultas localmente, con la
+misma semántica que la app: subcadena sin mayúsculas ni tildes, OR entre
+Contenido y RIE, OR dentro de una faceta y AND entre facetas. No hace falta
+ningún servidor de Python; alcanza con cualquier hosting de archivos.
+
+Uso:
+    python -m buscador.estatico [--salida sitio] [--dataset NOMBRE ...]
+"""
+import argparse
+import base64
+import json
+import os
+import re
+import shutil
+import sys
+
+import numpy as np
+
+from .datasets import RegistroDatasets, datasets_por_defecto
+from .ingesta import RAIZ
+from .normalizacion import normalizar
+
+PLANTILLA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "estatico.html")
+SALIDA = os.path.join(RAIZ, "sitio")
+
+
+def _b64(array):
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+
+def _slug(nombre):
+    return re.sub(r"[^a-z0-9]+", "-", normalizar(nombre)).strip("-")
+
+
+def indice_de_texto(indice, ancho):
+    """Vocabulario y listas de filas de un ``IndiceTexto``, en arrays planos."""
+    largos = np.array([len(p) for p in indice.postings], dtype=np.uint32)
+    postings = np.concatenate(indice.postings) if indice.postings else np.empty(0)
+    return {
+        "tokens": indice.vocabulario,
+        "largos": _b64(largos),
+        "filas": _b64(postings.astype(ancho)),
+    }
+
+
+def exportar_dataset(nombre, datos):
+    df = datos.df.iloc[:, datos.columnas_grilla]
+    celdas = df.astype(object).where(df.notna(), None).to_numpy().tolist()
+    # Filas de hasta 65535 entran en 2 bytes por posición
+    ancho = "<u2" if len(df) < 2 ** 16 else "<u4"
+    facetas = {}
+    for col in (datos.grado_col, datos.espacio_col, datos.unidad_col):
+        facetas[col] = {
+            "valores": datos.facetas.valores[col],
+            "bitmaps": [_b64(np.packbits(m, bitorder="little")) for m in datos.facetas.mascaras[col]],
+        }
+    return {
+        "nombre": nombre,
+        "version": datos.version,
+        "nivel": datos.nivel,
+        "columnas": list(df.columns),
+        "contenido": datos.t_col,
+        "rie": datos.rie_col,
+        "filas": celdas,
+        "ancho": 2 if ancho == "<u2" else 4,
+        "texto": {col: indice_de_texto(datos.indices[col], ancho) for col in (datos.t_col, datos.rie_col)},
+        "facetas": facetas,
+    }
+
+
+def exportar(salida=SALIDA, nombres=None, registro=None):
+    """Escribe el sitio en ``salida``; devuelve la lista de archivos de datos."""
+    registro = registro or RegistroDatasets(datasets_por_defecto())
+    nombres = nombres or registro.nombres()
+    os.makedirs(salida, exist_ok=True)
+    manifiesto = []
+    for nombre in nombres:
+        datos = registro.obtener(nombre)
+        archivo = f"datos-{_slug(nombre)}.json"
+        with open(os.path.join(salida, archivo), "w", encoding="utf-8") as f:
+            json.dump(exportar_dataset(nombre, datos), f, ensure_ascii=False, separators=(",", ":"))
+        manifiesto.append({"nombre": nombre, "archivo": archivo, "version": datos.version})
+        print(f"{nombre}: {len(datos.df)} filas -> {archivo}")
+    with open(os.path.join(salida, "datasets.json"), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False)
+    shutil.copyfile(PLANTILLA, os.path.join(salida, "index.html"))
+    return manifiesto
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--salida", default=SALIDA)
+    parser.add_argument("--dataset", action="append", dest="datasets",
+                        help="conjunto a exportar (se puede repetir); por defecto, todos")
+    args = parser.parse_args(argv)
+    exportar(args.salida, args.datasets)
+    print(f"Sitio en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Exportación de resultados a CSV y XLSX sin armar el archivo entero en memoria.
+
+Las filas se materializan de a bloques de ``BLOQUE``, así que un resultado
+grande (un Espacio entero) nunca se copia completo a un DataFrame:
+
+* ``csv_en_bloques`` devuelve el CSV de a pedazos, para una respuesta en
+  streaming.
+* ``escribir_xlsx`` usa el modo write-only de openpyxl: cada fila se escribe
+  al archivo y se descarta, y la memoria no crece con la cantidad de filas.
+* ``xlsx_en_bloques`` escribe a un archivo temporal y lo devuelve de a
+  pedazos.
+* ``a_archivo`` deja la exportación entera en un archivo temporal, para
+  clientes que piden un archivo y no un iterador (el ``download_button`` de
+  Streamlit).
+"""
+import tempfile
+
+import pandas as pd
+
+from .resultados import materializar
+
+BLOQUE = 1000
+PEDAZO = 64 * 1024
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _bloques(df, filas, columnas, bloque):
+    for inicio in range(0, len(filas), bloque):
+        yield materializar(df, filas[inicio:inicio + bloque], columnas)
+
+
+def csv_en_bloques(df, filas, columnas, bloque=BLOQUE):
+    """Bytes del CSV (UTF-8 con BOM, para que Excel respete las tildes), por bloque de filas."""
+    yield "\ufeff".encode("utf-8") + materializar(df, filas[:0], columnas).to_csv(index=False).encode("utf-8")
+    for parte in _bloques(df, filas, columnas, bloque):
+        yield parte.to_csv(index=False, header=False).encode("utf-8")
+
+
+def escribir_xlsx(destino, df, filas, columnas, bloque=BLOQUE, hoja="Recursos"):
+    """Escribe las filas en ``destino`` (ruta o archivo binario) como XLSX."""
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    def celda(valor):
+        if isinstance(valor, str):
+            # Caracteres de control que pegan desde otros documentos: XLSX no los admite
+            return ILLEGAL_CHARACTERS_RE.sub("", valor)
+        return None if pd.isna(valor) else valor
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(hoja)
+    hoja.append(list(df.columns[columnas]))
+    for parte in _bloques(df, filas, columnas, bloque):
+        for fila in parte.itertuples(index=False, name=None):
+            hoja.append([celda(v) for v in fila])
+    libro.save(destino)
+
+
+def a_archivo(formato, df, filas, columnas, bloque=BLOQUE):
+    """La exportación en ``formato`` en un archivo temporal, leído desde el principio.
+
+    El archivo no tiene buffer (``io.FileIO``): quien lo lee entero no guarda
+    otra copia además de la suya. Se borra solo al cerrarlo.
+    """
+    tmp = tempfile.TemporaryFile(buffering=0)
+    try:
+        if formato == "csv":
+            for parte in csv_en_bloques(df, filas, columnas, bloque):
+                tmp.write(parte)
+        else:
+            escribir_xlsx(tmp, df, filas, columnas, bloque)
+        tmp.seek(0)
+    except BaseException:
+        tmp.close()
+        raise
+    return tmp
+
+
+def xlsx_en_bloques(df, filas, columnas, bloque=BLOQUE):
+    """Bytes del XLSX de a pedazos de ``PEDAZO``, desde un archivo temporal."""
+    with a_archivo("xlsx", df, filas, columnas, bloque) as tmp:
+        while pedazo := tmp.read(PEDAZO):
+            yield pedazo
+
+
+def en_bloques(formato, df, filas, columnas):
+    """Generador de bytes de la exportación en ``formato`` ("csv" o "xlsx")."""
+    if formato == "csv":
+        return csv_en_bloques(df, filas, columnas)
+    return xlsx_en_bloques(df, filas, columnas)
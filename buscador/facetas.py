@@ -0,0 +1,98 @@
+"""Índice de facetas (Grado, Espacio, Unidad curricular) con una máscara por valor.
+
+Cada columna de filtro se guarda como códigos de una categoría y, por cada
+valor, una máscara booleana precalculada. Cualquier combinación de filtros
+se resuelve con OR (valores de una misma columna) y AND (entre columnas)
+vectorizados, sin armar DataFrames intermedios.
+
+Para los filtros en cascada, las opciones de Espacio y Unidad se acotan a los
+valores que tienen alguna fila con todo lo ya elegido en las columnas
+anteriores a la vez (la máscara combinada, no cada columna por separado).
+"""
+import numpy as np
+import pandas as pd
+
+
+def a_categorias(df, columnas):
+    for col in columnas:
+        df[col] = df[col].astype("category")
+    return df
+
+
+class IndiceFacetas:
+    def __init__(self, df, columnas):
+        self.n = len(df)
+        self.columnas = tuple(columnas)
+        self.valores = {}
+        self.posicion = {}
+        self.mascaras = {}
+        for col in columnas:
+            cat = pd.Categorical(df[col])
+            codigos = cat.codes
+            con_valor = codigos >= 0
+            # Matriz (valores x filas): la fila i de la matriz es la máscara del valor i
+            mascaras = np.zeros((len(cat.categories), self.n), dtype=bool)
+            mascaras[codigos[con_valor], np.flatnonzero(con_valor)] = True
+            self.valores[col] = list(cat.categories)
+            self.posicion[col] = {v: i for i, v in enumerate(cat.categories)}
+            self.mascaras[col] = mascaras
+
+    @property
+    def nbytes(self):
+        return sum(m.nbytes for m in self.mascaras.values())
+
+    def opciones(self, col, filtros=None):
+        """Valores de ``col``; con ``filtros``, solo los que tienen alguna fila con
+        todo lo elegido en las columnas anteriores (más los ya elegidos en ``col``,
+        para no perderlos).
+        """
+        # Los valores que no están en este conjunto (una selección vieja) no acotan
+        anteriores = {
+            c: [v for v in filtros.get(c, []) if v in self.posicion[c]]
+            for c in self.columnas[:self.columnas.index(col)]
+        } if filtros else {}
+        if not any(anteriores.values()):
+            return self.valores[col]
+        conteo = self.conteos(col, anteriores)
+        elegidos = set(filtros.get(col, []))
+        return [v for v in self.valores[col] if conteo[v] > 0 or v in elegidos]
+
+    def mascara(self, col, seleccion):
+        """Filas que tienen alguno de los valores seleccionados en ``col``."""
+        idx = [self.posicion[col][v] for v in seleccion if v in self.posicion[col]]
+        if not idx:
+            return np.zeros(self.n, dtype=bool)
+        return np.logical_or.reduce(self.mascaras[col][idx], axis=0)
+
+    def mascara_de_posiciones(self, posiciones):
+        mascara = np.zeros(self.n, dtype=bool)
+        mascara[posiciones] = True
+        return mascara
+
+    def combinar(self, filtros, base=None):
+        """Máscara final: AND de las facetas con selección y de ``base``.
+
+        ``filtros`` es un dict columna -> valores elegidos (las listas vacías no
+        filtran); ``base`` es una máscara con los demás filtros (texto, libros...)
+        y no se modifica. Devuelve ``None`` si no hay ningún filtro activo.
+        """
+        mascara = None if base is None else base.copy()
+        for col, seleccion in filtros.items():
+            if not seleccion:
+                continue
+            m = self.mascara(col, seleccion)
+            mascara = m if mascara is None else np.logical_and(mascara, m, out=mascara)
+        return mascara
+
+    def conteos(self, col, filtros, base=None):
+        """Cuántas filas daría cada valor de ``col`` con los demás filtros activos.
+
+        La selección de la propia ``col`` no se tiene en cuenta: elegir otro valor
+        de la misma columna suma filas (OR), no las recorta.
+        """
+        otros = self.combinar({c: v for c, v in filtros.items() if c != col}, base)
+        if otros is None:
+            cuenta = np.count_nonzero(self.mascaras[col], axis=1)
+        else:
+            cuenta = np.count_nonzero(self.mascaras[col] & otros, axis=1)
+        return dict(zip(self.valores[col], cuenta.tolist()))
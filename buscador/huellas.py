@@ -0,0 +1,55 @@
+"""Huellas por fila para actualizar los índices solo con lo que cambió.
+
+Cada snapshot guarda un hash de 64 bits del contenido de cada fila. Al
+refrescar, las filas del snapshot nuevo se emparejan con las del anterior
+por huella: las que tienen pareja no cambiaron (aunque se hayan movido) y sus
+datos ya parseados se reutilizan; solo las demás (insertadas o editadas) se
+vuelven a procesar. Las del anterior que quedaron sin pareja se borraron.
+
+Todo se expresa con ``origen``: para cada fila nueva, la posición de la fila
+igual en el snapshot anterior, o -1 si hay que procesarla.
+"""
+import numpy as np
+import pandas as pd
+
+
+def huellas(df):
+    """Hash (uint64) del contenido de cada fila de ``df``."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _rango_en_grupo(ordenadas):
+    """Para huellas ya ordenadas, cuántas iguales hay antes de cada una."""
+    n = len(ordenadas)
+    inicio_grupo = np.ones(n, dtype=bool)
+    inicio_grupo[1:] = ordenadas[1:] != ordenadas[:-1]
+    inicios = np.flatnonzero(inicio_grupo)
+    return np.arange(n) - np.repeat(inicios, np.diff(np.append(inicios, n)))
+
+
+def emparejar(viejas, nuevas):
+    """``origen`` de cada fila nueva: la fila anterior con la misma huella o -1.
+
+    Las filas repetidas se emparejan en orden: la k-ésima aparición de una
+    huella en ``nuevas`` con la k-ésima en ``viejas``.
+    """
+    orden_viejas = np.argsort(viejas, kind="stable")
+    viejas_ordenadas = viejas[orden_viejas]
+    orden_nuevas = np.argsort(nuevas, kind="stable")
+    rango = np.empty(len(nuevas), dtype=np.int64)
+    rango[orden_nuevas] = _rango_en_grupo(nuevas[orden_nuevas])
+
+    desde = np.searchsorted(viejas_ordenadas, nuevas, side="left")
+    hasta = np.searchsorted(viejas_ordenadas, nuevas, side="right")
+    hay = desde + rango < hasta
+    origen = np.full(len(nuevas), -1, dtype=np.int64)
+    origen[hay] = orden_viejas[desde[hay] + rango[hay]]
+    return origen
+
+
+def destinos(origen, n_viejas):
+    """Inverso de ``origen``: para cada fila anterior, su posición nueva o -1."""
+    destino = np.full(n_viejas, -1, dtype=np.int64)
+    hay = origen >= 0
+    destino[origen[hay]] = np.flatnonzero(hay)
+    return destino
@@ -0,0 +1,335 @@
+"""Índice invertido por token para las búsquedas de texto.
+
+Se arma una vez por snapshot sobre una columna ya normalizada (ver
+``normalizacion``) y devuelve posiciones de fila (ordenadas) sin recorrer
+todas las celdas en cada búsqueda.
+
+Semántica respecto de ``Series.str.contains(termino, case=False)``:
+
+* El término se busca como subcadena, igual que antes: "fracc" encuentra
+  "fracciones" y "de dos" encuentra "de dos en dos".
+* El término se toma literal, no como expresión regular. Antes "(p. c." hacía
+  fallar la app y "." coincidía con cualquier carácter.
+* No se distinguen mayúsculas ni tildes: "numeracion" encuentra "NUMERACIÓN".
+
+Además guarda, por cada aparición de un token en una fila, su peso BM25 ya
+calculado, para ordenar resultados por relevancia (``puntajes``) sumando
+solo los pesos de las listas de los tokens consultados.
+
+Para la búsqueda mientras se escribe (``buscar_incremental``) hay además una
+lista ordenada de todos los sufijos del vocabulario: los tokens que contienen
+una subcadena son los de un rango contiguo de esa lista, que se ubica con dos
+búsquedas binarias.
+"""
+import re
+import sys
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+import numpy as np
+
+from .difuso import IndiceTrigramas
+from .huellas import destinos
+from .normalizacion import normalizar
+
+_TOKEN = re.compile(r"\w+")
+_VACIO = np.empty(0, dtype=np.int32)
+
+# Unir la lista de un token cuesta más o menos lo que buscar una subcadena en
+# tantos textos (ver ``buscar_incremental``)
+FILTRAR_POR_TOKEN = 10
+
+# Parámetros de BM25
+K1 = 1.2
+B = 0.75
+
+
+def tokenizar(texto):
+    return _TOKEN.findall(texto)
+
+
+class IndiceTexto:
+    def __init__(self, textos_normalizados):
+        self.textos = [t if isinstance(t, str) else "" for t in textos_normalizados]
+        ids = {}
+        tids, filas, tf, longitudes = self._tokenizar(range(len(self.textos)), ids)
+        self._armar(list(ids), tids, filas, tf, longitudes)
+
+    def _tokenizar(self, filas, ids):
+        """Apariciones (id de token, fila, frecuencia) en ``filas`` y largo de cada una.
+
+        ``ids`` asigna un id a cada token y se completa con los que no tenía.
+        """
+        tids, posiciones, tf = [], [], []
+        longitudes = np.zeros(len(filas), dtype=np.float32)
+        for k, fila in enumerate(filas):
+            tokens = tokenizar(self.textos[fila])
+            longitudes[k] = len(tokens)
+            for token, frecuencia in Counter(tokens).items():
+                tids.append(ids.setdefault(token, len(ids)))
+                posiciones.append(fila)
+                tf.append(frecuencia)
+        return (np.array(tids, dtype=np.int64), np.array(posiciones, dtype=np.int32),
+                np.array(tf, dtype=np.uint16), longitudes)
+
+    def _armar(self, vocabulario, tids, filas, tf, longitudes, anterior=None):
+        """Ordena las apariciones por token y fila y arma listas, pesos y vocabulario.
+
+        ``vocabulario[tid]`` es el token de cada id, sin orden; todos tienen
+        alguna aparición.
+        """
+        orden_vocabulario = sorted(range(len(vocabulario)), key=vocabulario.__getitem__)
+        rango = np.empty(len(vocabulario), dtype=np.int64)
+        rango[orden_vocabulario] = np.arange(len(vocabulario))
+        self.vocabulario = [vocabulario[i] for i in orden_vocabulario]
+        tids = rango[tids]
+        orden = np.lexsort((filas, tids))
+        tids, filas, tf = tids[orden], filas[orden], tf[orden]
+
+        self.longitudes = longitudes
+        if len(self.vocabulario):
+            cortes = np.flatnonzero(np.diff(tids)) + 1
+            self.postings = np.split(filas, cortes)
+            self.frecuencias = np.split(tf, cortes)
+            self.pesos = np.split(self._pesos_bm25(tids, filas, tf), cortes)
+        else:
+            self.postings, self.frecuencias, self.pesos = [], [], []
+
+        if anterior is not None and anterior.vocabulario == self.vocabulario:
+            # El mismo vocabulario: todo lo que depende solo de él se comparte
+            self._blob, self._inicios = anterior._blob, anterior._inicios
+            self.trigramas, self._lista_sufijos = anterior.trigramas, anterior._lista_sufijos
+            return
+        # Todo el vocabulario en un solo string: buscar una subcadena en los
+        # tokens es un str.find en C en vez de un bucle en Python por token
+        self._blob = "\n".join(self.vocabulario)
+        largos = np.array([len(t) + 1 for t in self.vocabulario], dtype=np.int64)
+        self._inicios = (np.cumsum(largos) - largos).tolist()
+        # Para la búsqueda tolerante a errores (ver ``buscar_difuso``)
+        self.trigramas = IndiceTrigramas(self.vocabulario)
+        # Se arma la primera vez que se busca mientras se escribe (ver ``_sufijos``)
+        self._lista_sufijos = None
+
+    def actualizar(self, textos_normalizados, origen):
+        """Índice nuevo para ``textos_normalizados``, reutilizando este.
+
+        ``origen`` dice, para cada texto nuevo, qué fila de este índice tiene el
+        mismo texto, o -1 (ver ``huellas.emparejar``). Solo se tokenizan los
+        textos sin origen; las apariciones de los demás se mueven a su fila
+        nueva con operaciones vectorizadas. Este índice no se modifica.
+        """
+        nuevo = IndiceTexto.__new__(IndiceTexto)
+        cambiadas = np.flatnonzero(origen < 0)
+        # Los textos sin cambios son los mismos objetos del índice anterior
+        nuevo.textos = [self.textos[o] for o in origen.tolist()]
+        valores = getattr(textos_normalizados, "iloc", textos_normalizados)
+        for fila in cambiadas.tolist():
+            texto = valores[fila]
+            nuevo.textos[fila] = texto if isinstance(texto, str) else ""
+        destino = destinos(origen, len(self.textos))
+
+        largos = np.array([len(p) for p in self.postings], dtype=np.int64)
+        tids = np.repeat(np.arange(len(self.vocabulario), dtype=np.int64), largos)
+        filas = destino[np.concatenate(self.postings)] if self.postings else np.empty(0, dtype=np.int64)
+        tf = np.concatenate(self.frecuencias) if self.frecuencias else np.empty(0, dtype=np.uint16)
+        quedan = filas >= 0
+
+        ids = {token: i for i, token in enumerate(self.vocabulario)}
+        tids_nuevos, filas_nuevas, tf_nuevos, longitudes_nuevas = nuevo._tokenizar(cambiadas, ids)
+        tids = np.concatenate([tids[quedan], tids_nuevos])
+        filas = np.concatenate([filas[quedan].astype(np.int32), filas_nuevas])
+        tf = np.concatenate([tf[quedan], tf_nuevos])
+
+        # Los tokens que ya no aparecen en ninguna fila salen del vocabulario
+        vocabulario = list(ids)
+        presentes = np.bincount(tids, minlength=len(vocabulario)) > 0
+        if not presentes.all():
+            compacto = np.cumsum(presentes) - 1
+            tids = compacto[tids]
+            vocabulario = [t for t, ok in zip(vocabulario, presentes) if ok]
+
+        longitudes = np.zeros(len(nuevo.textos), dtype=np.float32)
+        hay = origen >= 0
+        longitudes[hay] = self.longitudes[origen[hay]]
+        longitudes[cambiadas] = longitudes_nuevas
+        nuevo._armar(vocabulario, tids, filas, tf, longitudes, anterior=self)
+        return nuevo
+
+    def _pesos_bm25(self, tids, filas, tf):
+        """Peso BM25 de cada aparición (token, fila), en arrays planos."""
+        n = len(self.textos)
+        promedio = max(float(self.longitudes.mean()), 1.0)
+        df = np.bincount(tids, minlength=len(self.vocabulario)).astype(np.float32)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        tf = tf.astype(np.float32)
+        pesos = idf[tids] * tf * (K1 + 1) / (tf + K1 * (1 - B + B * self.longitudes[filas] / promedio))
+        return pesos.astype(np.float32)
+
+    def __len__(self):
+        return len(self.textos)
+
+    @property
+    def nbytes(self):
+        """Tamaño aproximado en memoria (postings, vocabulario y textos)."""
+        return (
+            sum(p.nbytes for p in self.postings)
+            + sum(p.nbytes for p in self.pesos)
+            + sum(p.nbytes for p in self.frecuencias)
+            + self.longitudes.nbytes
+            + sum(sys.getsizeof(t) for t in self.vocabulario)
+            + sum(sys.getsizeof(t) for t in self.textos)
+            + sys.getsizeof(self._blob)
+            + self.trigramas.nbytes
+            + (0 if self._lista_sufijos is None
+               else sum(sys.getsizeof(t) for t in self._lista_sufijos[0]) + self._lista_sufijos[1].nbytes)
+        )
+
+    def tokens_con(self, subcadena):
+        """Ids de los tokens del vocabulario que contienen ``subcadena``."""
+        ids = []
+        i = self._blob.find(subcadena)
+        while i != -1:
+            tid = bisect_right(self._inicios, i) - 1
+            ids.append(tid)
+            if tid + 1 == len(self._inicios):
+                break
+            i = self._blob.find(subcadena, self._inicios[tid + 1])
+        return ids
+
+    def _sufijos(self):
+        """Sufijos del vocabulario ordenados, con el id del token de cada uno."""
+        if self._lista_sufijos is None:
+            pares = sorted((token[i:], tid) for tid, token in enumerate(self.vocabulario) for i in range(len(token)))
+            self._lista_sufijos = ([s for s, _ in pares], np.array([tid for _, tid in pares], dtype=np.int32))
+        return self._lista_sufijos
+
+    def tokens_en_rango(self, subcadena):
+        """Como ``tokens_con``, pero con un rango de la lista de sufijos.
+
+        No depende de cuántos tokens coinciden: conviene con subcadenas cortas,
+        como las primeras letras que se escriben.
+        """
+        sufijos, ids = self._sufijos()
+        desde = bisect_left(sufijos, subcadena)
+        hasta = bisect_left(sufijos, subcadena + "\U0010ffff", desde)
+        return np.unique(ids[desde:hasta]).tolist()
+
+    def filas_con_token(self, subcadena):
+        return self._filas_de(self.tokens_con(subcadena))
+
+    def _filas_de(self, ids):
+        """Unión (ordenada) de las listas de los tokens ``ids``."""
+        if not ids:
+            return _VACIO
+        if len(ids) == 1:
+            return self.postings[ids[0]]
+        if len(ids) <= 8:
+            return np.unique(np.concatenate([self.postings[i] for i in ids]))
+        # Subcadenas cortas tocan muchos tokens: se marcan en una máscara en vez
+        # de concatenar y ordenar todas las listas
+        marca = np.zeros(len(self.textos), dtype=bool)
+        for i in ids:
+            marca[self.postings[i]] = True
+        return np.flatnonzero(marca).astype(np.int32)
+
+    def buscar(self, termino):
+        """Posiciones de las filas cuyo texto contiene ``termino``."""
+        termino = normalizar(termino)
+        tokens = tokenizar(termino)
+        if not tokens:
+            # Solo signos o espacios: no hay nada que indexar, se recorre la columna
+            return np.array([i for i, t in enumerate(self.textos) if termino in t], dtype=np.int32)
+
+        candidatos = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            filas = self.filas_con_token(token)
+            candidatos = filas if candidatos is None else np.intersect1d(candidatos, filas, assume_unique=True)
+            if len(candidatos) == 0:
+                return _VACIO
+
+        # Un único token sin espacios ni signos no puede cruzar el límite de un token:
+        # los candidatos ya son exactos. Si no, se verifica la frase solo en ellos.
+        if len(tokens) == 1 and tokens[0] == termino:
+            return candidatos
+        return np.array([i for i in candidatos if termino in self.textos[i]], dtype=np.int32)
+
+    def buscar_incremental(self, termino, previo=None):
+        """Lo mismo que ``buscar``, para consultas que se repiten tecla a tecla.
+
+        ``previo`` es ``(termino, filas)`` de la búsqueda anterior. Si el término
+        nuevo empieza con el anterior, sus filas son un subconjunto de esas: se
+        parte de ellas y solo se buscan las palabras que cambiaron.
+        """
+        termino = normalizar(termino)
+        tokens = tokenizar(termino)
+        if not tokens:
+            return self.buscar(termino)
+
+        candidatos, desde = None, 0
+        if previo is not None:
+            anterior = normalizar(previo[0])
+            tokens_previos = tokenizar(anterior)
+            if tokens_previos and termino.startswith(anterior):
+                # Las palabras completas del término anterior ya se cumplen en sus
+                # filas; la última puede haber crecido
+                candidatos, desde = previo[1], len(tokens_previos) - 1
+        for token in sorted(set(tokens[desde:]), key=len, reverse=True):
+            ids = self.tokens_en_rango(token)
+            if candidatos is not None and len(candidatos) < FILTRAR_POR_TOKEN * len(ids):
+                # Pocas filas y muchos tokens: sale más barato mirar el texto de
+                # cada fila que unir las listas
+                candidatos = np.array([i for i in candidatos if token in self.textos[i]], dtype=np.int32)
+            else:
+                filas = self._filas_de(ids)
+                candidatos = filas if candidatos is None else np.intersect1d(candidatos, filas, assume_unique=True)
+            if len(candidatos) == 0:
+                return _VACIO
+
+        if len(tokens) == 1 and tokens[0] == termino:
+            return candidatos
+        return np.array([i for i in candidatos if termino in self.textos[i]], dtype=np.int32)
+
+    def buscar_difuso(self, termino):
+        """Como ``buscar``, pero cada palabra acepta errores de tipeo.
+
+        Una fila coincide si cada palabra del término aparece en ella (como
+        subcadena de un token) o se parece a alguno de sus tokens según
+        ``difuso.max_errores``. Las frases no se verifican como frase.
+        """
+        tokens = set(tokenizar(normalizar(termino)))
+        if not tokens:
+            return self.buscar(termino)
+        candidatos = None
+        for q in sorted(tokens, key=len, reverse=True):
+            ids = set(self.tokens_con(q)) | set(self.trigramas.similares(q).tolist())
+            filas = self._filas_de(sorted(ids))
+            candidatos = filas if candidatos is None else np.intersect1d(candidatos, filas, assume_unique=True)
+            if len(candidatos) == 0:
+                return _VACIO
+        return candidatos
+
+    def puntajes(self, termino, difuso=False):
+        """Puntaje BM25 de las filas que contienen algún token de ``termino``.
+
+        Cada token consultado se expande, igual que en ``buscar``, a los tokens
+        del vocabulario que lo contienen; las expansiones parciales pesan en
+        proporción al largo ("fraccion" cuenta 0,8 en "fracciones"). El costo
+        depende solo del largo de las listas tocadas, no del tamaño de la tabla.
+        Con ``difuso`` también suman, a mitad de peso, las palabras parecidas.
+        Devuelve ``(filas, puntajes)`` con las filas ordenadas.
+        """
+        filas, pesos = [], []
+        for q in set(tokenizar(normalizar(termino))):
+            ids = self.tokens_con(q)
+            for tid in ids:
+                filas.append(self.postings[tid])
+                pesos.append(self.pesos[tid] * (len(q) / len(self.vocabulario[tid])))
+            if difuso:
+                # Las palabras parecidas (con errores) cuentan la mitad
+                for tid in set(self.trigramas.similares(q).tolist()) - set(ids):
+                    filas.append(self.postings[tid])
+                    pesos.append(self.pesos[tid] * 0.5)
+        if not filas:
+            return _VACIO, np.empty(0, dtype=np.float32)
+        unicas, inversa = np.unique(np.concatenate(filas), return_inverse=True)
+        return unicas, np.bincount(inversa, weights=np.concatenate(pesos)).astype(np.float32)
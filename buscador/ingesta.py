@@ -0,0 +1,334 @@
+"""Ingesta de los libros de Excel del mapa de recursos a un único Parquet.
+
+Lee todas las hojas de "Mapa Primaria 2025.xlsx", "Mapa Secundaria 2025.xlsx"
+y los libros "Espacio ...", cada hoja en un proceso aparte (openpyxl es
+lento), las lleva al esquema que usa la app y las guarda juntas en
+``.cache/consolidado-<hash>.parquet``. El hash depende del contenido de los
+libros, así que si ninguno cambió no se vuelve a procesar nada.
+
+Uso:
+    python -m buscador.ingesta [--procesos N] [--forzar] [libro.xlsx ...]
+"""
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .archivos import escribir_atomico, guardar_meta, leer_meta
+from .huellas import huellas
+from .normalizacion import normalizar
+from .snapshot import CACHE_DIR, Snapshot
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FICHAS = "Fichas (Informativas, Operativas y Estratégicas)"
+ESQUEMA = [
+    "Grado", "Espacio", "Unidad curricular", "Contenidos", "RIE",
+    FICHAS, "Videolecciones", "Libros de texto",
+]
+PROCEDENCIA = ["Nivel", "Archivo", "Hoja"]
+# Columnas de recursos: una fila sin ninguna de ellas no aporta nada
+RECURSOS = ["Contenidos", "RIE", FICHAS, "Videolecciones", "Libros de texto"]
+
+# Cambiarla invalida los consolidados ya generados (p. ej. si cambian las reglas)
+VERSION_ESQUEMA = "2"
+
+_ORDINAL = r"(\d+)\s*(?:°|º|ro|do|er|ero|to|mo|vo|no)\b\.?"
+_GRADO_INICIAL = re.compile(r"^\s*" + _ORDINAL + r"(?:\s*grado)?", re.IGNORECASE)
+# Al final de la unidad el ordinal puede venir sin sufijo: "Ciencias del Ambiente (Biología) 3"
+_ORDINAL_FINAL = re.compile(r"\s+(\d+)\s*(?:°|º|ro|do|er|ero|to|mo|vo|no)?\.?\s*$", re.IGNORECASE)
+_MINUSCULAS = {"de", "del", "la", "las", "los", "y", "e", "en"}
+
+
+def libros_por_defecto(raiz=RAIZ):
+    return sorted(glob.glob(os.path.join(raiz, "Mapa * 20*.xlsx")) + glob.glob(os.path.join(raiz, "Espacio *.xlsx")))
+
+
+def nivel_de(ruta):
+    return "Secundaria" if "secundaria" in normalizar(os.path.basename(ruta)) else "Primaria"
+
+
+def _texto(valor):
+    return valor if isinstance(valor, str) and valor.strip() else None
+
+
+def _una_linea(valor):
+    """ "Ciencias \\nSociales y \\nHumanidades" -> "Ciencias Sociales y Humanidades"."""
+    valor = _texto(valor)
+    return " ".join(valor.split()) if valor else None
+
+
+def _titulo_espaciado(texto):
+    """ "E  S  P  A  C  I  O       D  E  ..." -> "ESPACIO DE ..."."""
+    return " ".join(re.sub(r"\s+", "", p) for p in re.split(r"\s{3,}", texto.strip()) if p.strip())
+
+
+def _capitalizar(texto):
+    palabras = texto.lower().split()
+    return " ".join(p if p in _MINUSCULAS else p.capitalize() for p in palabras)
+
+
+def _espacio_de_titulo(crudo):
+    """Espacio a partir del título de la hoja, en los libros de Secundaria."""
+    for valor in crudo.iloc[:3, 0]:
+        valor = _texto(valor)
+        if not valor:
+            continue
+        titulo = _titulo_espaciado(valor)
+        m = re.match(r"ESPACIO\s*:?\s*(.+?)\s*(?:\(|$)", titulo)
+        if m:
+            return _capitalizar(m.group(1))
+    return None
+
+
+def _partir_grado(valor):
+    """ "7mo\\nMatemática" -> ("7° grado", "Matemática"); "1° grado" -> ("1° grado", None)."""
+    valor = _texto(valor)
+    if not valor:
+        return None, None
+    m = _GRADO_INICIAL.match(valor)
+    if not m:
+        return _una_linea(valor), None
+    resto = _una_linea(valor[m.end():])
+    return f"{int(m.group(1))}° grado", resto
+
+
+def _clasificar(encabezado):
+    """Campo del esquema al que corresponde un encabezado (o None si se ignora)."""
+    e = " ".join(normalizar(encabezado).split()) if _texto(encabezado) else ""
+    if e == "grado":
+        return "Grado"
+    if e in ("espacio", "area"):
+        return "Espacio"
+    if e.startswith("unidad curricular"):
+        return "Unidad curricular"
+    if e.startswith("contenido") and "estructurante" not in e:
+        return "Contenidos"
+    if e.startswith("rie"):
+        return "RIE"
+    if e.startswith("fichas"):
+        return FICHAS
+    if e.startswith("videolecciones"):
+        return "Videolecciones"
+    if e.startswith("libros"):
+        return "Libros de texto"
+    return None
+
+
+def _es_encabezado(campos):
+    return "Contenidos" in campos and sum(c is not None for c in campos) >= 2
+
+
+def _fila_encabezado(crudo):
+    for i in range(min(15, len(crudo))):
+        campos = [_clasificar(v) for v in crudo.iloc[i]]
+        if _es_encabezado(campos):
+            return i, campos
+    return None, None
+
+
+def _bloques(campos):
+    """Agrupa las columnas en bloques de recursos.
+
+    Algunas hojas de Secundaria repiten "Contenidos / RIE / Libros" dos veces
+    en la misma fila (p. ej. contenidos esenciales y deseables): cada bloque
+    se convierte en filas propias. Grado, Espacio y Unidad son comunes.
+    """
+    comunes, bloques, actual = {}, [], {}
+    for col, campo in enumerate(campos):
+        if campo in ("Grado", "Espacio", "Unidad curricular"):
+            comunes.setdefault(campo, col)
+        elif campo == "Contenidos" and "Contenidos" in actual and (
+            "RIE" in actual or "Libros de texto" in actual
+        ):
+            bloques.append(actual)
+            actual = {campo: [col]}
+        elif campo is not None:
+            actual.setdefault(campo, []).append(col)
+    bloques.append(actual)
+    return comunes, bloques
+
+
+def _unir(fila):
+    partes = [v.strip() for v in fila if _texto(v)]
+    return "\n\n".join(partes) if partes else None
+
+
+def leer_hoja(ruta, hoja):
+    """Lee una hoja y la devuelve en el esquema de la app (``None`` si no aplica)."""
+    crudo = pd.read_excel(ruta, sheet_name=hoja, header=None, dtype=str)
+    fila, campos = _fila_encabezado(crudo)
+    if fila is None:
+        return None
+    datos = crudo.iloc[fila + 1:]
+    # Algunas hojas repiten el encabezado más abajo
+    repetido = [_es_encabezado([_clasificar(v) for v in f]) for f in datos.itertuples(index=False)]
+    datos = datos[[not r for r in repetido]].reset_index(drop=True)
+    comunes, bloques = _bloques(campos)
+
+    # Celdas combinadas: el valor solo está en la primera fila del grupo
+    comun = {campo: datos[col].ffill() for campo, col in comunes.items()}
+    base = pd.DataFrame(index=datos.index)
+
+    # Secundaria: "7mo\nMatemática" trae el grado y la unidad en la misma celda
+    grados, resto = [None] * len(datos), [None] * len(datos)
+    if "Grado" in comun:
+        grados, resto = map(list, zip(*map(_partir_grado, comun["Grado"]))) if len(datos) else ([], [])
+
+    unidades = [None] * len(datos)
+    if "Unidad curricular" in comun:
+        unidades = [_una_linea(v) for v in comun["Unidad curricular"]]
+        # Primaria: "Matemática 1ro" -> grado "1° grado", unidad "Matemática"
+        for i, u in enumerate(unidades):
+            m = _ORDINAL_FINAL.search(u or "")
+            if m:
+                grados[i] = grados[i] or f"{int(m.group(1))}° grado"
+                unidades[i] = u[:m.start()]
+
+    base["Grado"] = grados
+    if "Espacio" in comun:
+        base["Espacio"] = [_una_linea(v) for v in comun["Espacio"]]
+    else:
+        base["Espacio"] = _espacio_de_titulo(crudo) or hoja
+    base["Unidad curricular"] = [u or r or hoja for u, r in zip(unidades, resto)]
+
+    partes = []
+    for bloque in bloques:
+        if "Contenidos" not in bloque:
+            continue
+        parte = base.copy()
+        for campo in RECURSOS:
+            cols = bloque.get(campo, [])
+            parte[campo] = datos[cols].apply(_unir, axis=1) if cols else None
+        partes.append(parte)
+    if not partes:
+        return None
+
+    df = pd.concat(partes, ignore_index=True)
+    df = df[df[RECURSOS].notna().any(axis=1)]
+    df["Nivel"] = nivel_de(ruta)
+    df["Archivo"] = os.path.splitext(os.path.basename(ruta))[0]
+    df["Hoja"] = hoja
+    return df[ESQUEMA + PROCEDENCIA]
+
+
+def _leer_hoja_tarea(tarea):
+    ruta, hoja = tarea
+    inicio = time.perf_counter()
+    return ruta, hoja, leer_hoja(ruta, hoja), time.perf_counter() - inicio
+
+
+def _hojas(ruta):
+    from openpyxl import load_workbook
+    libro = load_workbook(ruta, read_only=True)
+    try:
+        return list(libro.sheetnames)
+    finally:
+        libro.close()
+
+
+def clave_de(archivos):
+    h = hashlib.sha256(VERSION_ESQUEMA.encode())
+    for ruta in sorted(archivos):
+        h.update(os.path.basename(ruta).encode("utf-8"))
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloque)
+    return h.hexdigest()[:16]
+
+
+def consolidar(archivos=None, cache_dir=CACHE_DIR, procesos=None, forzar=False, salida=print):
+    """Genera (si hace falta) el Parquet consolidado y devuelve su ruta."""
+    archivos = archivos or libros_por_defecto()
+    clave = clave_de(archivos)
+    ruta = os.path.join(cache_dir, f"consolidado-{clave}.parquet")
+    ruta_meta = os.path.join(cache_dir, f"consolidado-{clave}.json")
+    # consolidado.json apunta al último consolidado; cada uno tiene además el suyo
+    actual = os.path.join(cache_dir, "consolidado.json")
+
+    meta = leer_meta(ruta_meta)
+    if meta is not None and os.path.exists(ruta) and not forzar:
+        salida(f"Sin cambios en los libros: se usa {ruta}")
+        guardar_meta(actual, meta)
+        return ruta
+
+    tareas = [(a, h) for a in archivos for h in _hojas(a)]
+    inicio = time.perf_counter()
+    partes, hojas, duplicadas = [], [], []
+    # Algunos libros traen una hoja copiada entera ("Hoja1"): se guarda una sola vez
+    vistas = {}
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for archivo, hoja, df, segundos in pool.map(_leer_hoja_tarea, tareas):
+            nombre = f"{os.path.basename(archivo)} › {hoja}"
+            if df is None:
+                salida(f"  (omitida) {nombre}: no tiene columna de contenidos")
+                continue
+            contenido = (archivo, hashlib.sha256(huellas(df[ESQUEMA]).tobytes()).hexdigest())
+            if contenido in vistas:
+                salida(f"  (omitida) {nombre}: mismas filas que {vistas[contenido]}")
+                duplicadas.append(nombre)
+                continue
+            vistas[contenido] = nombre
+            salida(f"  {nombre}: {len(df)} filas en {segundos:.1f} s")
+            partes.append(df)
+            hojas.append(nombre)
+
+    df = pd.concat(partes, ignore_index=True)
+    os.makedirs(cache_dir, exist_ok=True)
+    escribir_atomico(ruta, lambda tmp: df.to_parquet(tmp, index=False))
+    meta = {
+        "archivo": os.path.basename(ruta), "version": clave, "hojas": hojas,
+        "duplicadas": duplicadas, "filas": len(df),
+    }
+    guardar_meta(ruta_meta, meta)
+    guardar_meta(actual, meta)
+    salida(f"{len(df)} filas de {len(hojas)} hojas en {time.perf_counter() - inicio:.1f} s -> {ruta}")
+    return ruta
+
+
+def hay_consolidado(cache_dir=CACHE_DIR):
+    return os.path.exists(os.path.join(cache_dir, "consolidado.json"))
+
+
+def cargar_consolidado(cache_dir=CACHE_DIR, archivo=None):
+    """Snapshot del último consolidado generado por ``consolidar``.
+
+    Con ``archivo`` (p. ej. "Mapa Secundaria 2025") solo se leen del Parquet
+    las filas de ese libro, sin las columnas de procedencia.
+    """
+    meta = leer_meta(os.path.join(cache_dir, "consolidado.json"))
+    if meta is None:
+        raise FileNotFoundError("No hay consolidado: correr `python -m buscador.ingesta`")
+    ruta = os.path.join(cache_dir, meta["archivo"])
+    if archivo is None:
+        df = pd.read_parquet(ruta)
+    else:
+        df = pd.read_parquet(ruta, columns=ESQUEMA, filters=[("Archivo", "==", archivo)])
+    return Snapshot(
+        df=df,
+        version=meta["version"] if archivo is None else f"{meta['version']}:{archivo}",
+        etag=None,
+        last_modified=None,
+        validado=os.path.getmtime(ruta),
+        origen="disco",
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consolida los libros de Excel del mapa de recursos.")
+    parser.add_argument("archivos", nargs="*", help="libros .xlsx (por defecto, los de la raíz del repo)")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument("--forzar", action="store_true", help="regenerar aunque los libros no hayan cambiado")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args(argv)
+    consolidar(args.archivos or None, args.cache_dir, args.procesos, args.forzar)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Índice estructurado de la columna "Libros de texto".
+
+Las celdas son texto libre ("El gato sin botas 1, pp. 30, 124-125\\n\\nGira
+molinete 1, p. 156", "Conexiones G1: p44/45, 50 a 55"). Al cargar se parsean
+una vez en registros (libro, página desde, página hasta) y por cada libro se
+guarda un índice de intervalos ordenado por página inicial, así que "qué
+contenidos usan las páginas 100 a 130 de Gira molinete 1" es un par de
+``searchsorted`` y no una búsqueda de subcadenas.
+"""
+import re
+from collections import Counter
+
+import numpy as np
+
+from .huellas import destinos
+from .normalizacion import normalizar
+
+_VACIO = np.empty(0, dtype=np.int32)
+
+# Dónde termina el título del libro y empiezan las páginas: "p."/"pp." (o "pp 11",
+# "G1_p22"), "páginas", ":", capítulo o tema, ", 112" y "Gira molinete 1 164-165"
+_MARCA = re.compile(
+    r",?\s*(?:(?:\b|(?<=_))pp?(?:\.|(?=\s*\d))|\bp[áa]ginas?\b|:|\bcap(?:ítulo)?(?![^\W\d])|\btema\b)"
+    r"|,(?=\s*\d)|(?<=\d)\s+(?=\d+\s*[-–]\s*\d)",
+    re.IGNORECASE,
+)
+# Páginas citadas como tales ("p. 18", "p18", "páginas")
+_PAGINA = re.compile(r"(?:\b|(?<=_))(?:pp?\.?\s*\d|p[áa]ginas?\b)", re.IGNORECASE)
+# Referencias que tienen números pero no son páginas
+_NO_PAGINA = re.compile(r"\b(?:tema|cap(?:ítulo)?)\s*\d+", re.IGNORECASE)
+_RANGO = re.compile(r"(\d+)(?:\s*(?:-|–|/|\ba\b|(?<=\d)a(?=\d))\s*p?\s*(\d+))?")
+_LARGO_MAXIMO = 500
+
+
+def _clave(titulo):
+    # "Gira Molinete 1" y "Gira molinete 1", "Conexiones789" y "Conexiones 789"
+    return re.sub(r"\W+", "", normalizar(titulo))
+
+
+def _rango(desde, hasta):
+    ini = int(desde)
+    if not hasta:
+        return ini, ini
+    fin = int(hasta)
+    # "146-7" abrevia 146-147
+    if fin < ini and len(hasta) < len(desde):
+        fin = int(desde[:len(desde) - len(hasta)] + hasta)
+    return min(ini, fin), max(ini, fin)
+
+
+def parsear(texto):
+    """Registros ``(título, desde, hasta)`` de una celda.
+
+    Un libro citado sin páginas ("Saber Hacer H5: Capítulo 3") da un registro
+    con ``desde`` y ``hasta`` en ``None``. Las líneas sin título reconocible
+    (notas, referencias sueltas a capítulos) se ignoran: un título sin número
+    de tomo solo cuenta si la línea cita páginas como tales ("Geografía
+    Humana y económica: p18 a 25", pero no "Libros de primero:").
+    """
+    registros = []
+    if not isinstance(texto, str):
+        return registros
+    for linea in texto.splitlines():
+        linea = " ".join(linea.split())
+        marca = _MARCA.search(linea)
+        if marca is None or marca.start() == 0:
+            continue
+        titulo = linea[:marca.start()].strip(" ,.;_")
+        resto = linea[marca.start():]
+        paginas = [_rango(desde, hasta) for desde, hasta in _RANGO.findall(_NO_PAGINA.sub(" ", resto))]
+        paginas = [(d, h) for d, h in paginas if h - d <= _LARGO_MAXIMO]
+        if not re.search(r"\d", titulo) and not (paginas and _PAGINA.search(resto)):
+            continue
+        if not paginas:
+            registros.append((titulo, None, None))
+        registros.extend((titulo, d, h) for d, h in paginas)
+    return registros
+
+
+def _registros(serie, filas):
+    """Cuántas veces aparece cada escritura de cada libro, y menciones e intervalos
+    (por clave de libro) de las ``filas`` de ``serie``."""
+    valores = serie.to_numpy(dtype=object)
+    por_valor, claves = {}, {}
+    conteos, menciones, intervalos = {}, {}, {}
+    for fila in filas:
+        valor = valores[fila]
+        if valor not in por_valor:
+            por_valor[valor] = parsear(valor)
+        for titulo, desde, hasta in por_valor[valor]:
+            if titulo not in claves:
+                claves[titulo] = _clave(titulo)
+            clave = claves[titulo]
+            conteos.setdefault(clave, Counter())[titulo] += 1
+            menciones.setdefault(clave, []).append(fila)
+            if desde is not None:
+                intervalos.setdefault(clave, []).append((desde, hasta, fila))
+    return conteos, menciones, intervalos
+
+
+class IndiceLibros:
+    def __init__(self, serie):
+        conteos, menciones, intervalos = _registros(serie, range(len(serie)))
+        self._armar(serie, conteos,
+                    {clave: np.array(filas) for clave, filas in menciones.items()},
+                    {clave: tuple(np.array(x) for x in zip(*r)) for clave, r in intervalos.items()})
+
+    def _armar(self, serie, conteos, menciones, intervalos):
+        """``menciones`` e ``intervalos`` (desde, hasta, filas) por clave, sin ordenar."""
+        self.serie = serie
+        self.n = len(serie)
+        self.conteos = {clave: c for clave, c in conteos.items() if +c}
+        # Se muestra la escritura más frecuente de cada libro
+        self.nombre = {clave: min(c, key=lambda t: (-c[t], t)) for clave, c in self.conteos.items()}
+        self.clave = {nombre: clave for clave, nombre in self.nombre.items()}
+        self.menciones = {
+            clave: np.unique(filas).astype(np.int32) for clave, filas in menciones.items() if len(filas)
+        }
+        self.intervalos = {}
+        for clave, (desde, hasta, filas) in intervalos.items():
+            if not len(filas):
+                continue
+            orden = np.lexsort((filas, hasta, desde))
+            desde, hasta, filas = (x[orden].astype(np.int32) for x in (desde, hasta, filas))
+            self.intervalos[clave] = (desde, hasta, filas, int((hasta - desde).max()))
+
+    def actualizar(self, serie, origen):
+        """Índice nuevo para ``serie`` que solo parsea las filas sin ``origen``
+        (ver ``huellas.emparejar``); este índice no se modifica."""
+        destino = destinos(origen, self.n)
+        # Lo que citaban las filas que ya no están se descuenta de las escrituras
+        conteos = {clave: Counter(c) for clave, c in self.conteos.items()}
+        for clave, c in _registros(self.serie, np.flatnonzero(destino < 0))[0].items():
+            conteos[clave].subtract(c)
+        nuevos_conteos, nuevas_menciones, nuevos_intervalos = _registros(serie, np.flatnonzero(origen < 0))
+        for clave, c in nuevos_conteos.items():
+            conteos.setdefault(clave, Counter()).update(c)
+
+        menciones = {}
+        for clave in set(self.menciones) | set(nuevas_menciones):
+            filas = destino[self.menciones.get(clave, _VACIO)]
+            extra = np.array(nuevas_menciones.get(clave, []), dtype=np.int64)
+            menciones[clave] = np.concatenate([filas[filas >= 0], extra])
+        intervalos = {}
+        for clave in set(self.intervalos) | set(nuevos_intervalos):
+            desde, hasta, filas, _ = self.intervalos.get(clave, (_VACIO, _VACIO, _VACIO, 0))
+            filas = destino[filas]
+            quedan = filas >= 0
+            extra = np.array(nuevos_intervalos.get(clave, []), dtype=np.int64).reshape(-1, 3)
+            intervalos[clave] = tuple(
+                np.concatenate([viejo[quedan], extra[:, i]]) for i, viejo in enumerate((desde, hasta, filas))
+            )
+        nuevo = IndiceLibros.__new__(IndiceLibros)
+        nuevo._armar(serie, conteos, menciones, intervalos)
+        return nuevo
+
+    @property
+    def nbytes(self):
+        return sum(m.nbytes for m in self.menciones.values()) + sum(
+            d.nbytes + h.nbytes + f.nbytes for d, h, f, _ in self.intervalos.values()
+        )
+
+    def titulos(self):
+        return sorted(self.clave, key=normalizar)
+
+    def filas(self, titulo, desde=None, hasta=None):
+        """Filas que citan ``titulo`` con alguna página dentro de ``[desde, hasta]``.
+
+        Sin páginas devuelve todas las filas que citan el libro.
+        """
+        clave = self.clave.get(titulo, _clave(titulo))
+        if desde is None and hasta is None:
+            return self.menciones.get(clave, _VACIO)
+        if clave not in self.intervalos:
+            return _VACIO
+        inicios, finales, filas, largo = self.intervalos[clave]
+        desde = 0 if desde is None else desde
+        hasta = np.iinfo(np.int32).max if hasta is None else hasta
+        # Solo los intervalos que empiezan en [desde - largo máximo, hasta] pueden solaparse
+        ini = np.searchsorted(inicios, desde - largo, side="left")
+        fin = np.searchsorted(inicios, hasta, side="right")
+        return np.unique(filas[ini:fin][finales[ini:fin] >= desde])
+
+    def mascara(self, titulos, desde=None, hasta=None):
+        """Filas que citan alguno de ``titulos`` en el rango de páginas."""
+        mascara = np.zeros(self.n, dtype=bool)
+        for titulo in titulos:
+            mascara[self.filas(titulo, desde, hasta)] = True
+        return mascara
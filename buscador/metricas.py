@@ -0,0 +1,150 @@
+"""Tiempos por etapa de cada rerun: logs estructurados, histogramas y formato Prometheus.
+
+Cada etapa se mide con ``METRICAS.tramo("nombre")``, por ejemplo la carga de
+datos, la búsqueda de texto o el armado de la grilla. Cada duración:
+
+* suma a un histograma del proceso, que se exporta en texto de Prometheus
+  (``prometheus``) al archivo ``ESTELA_METRICAS_ARCHIVO`` si está definido
+  (para el textfile collector de node_exporter) y en ``/metrics`` de la API;
+* si hay un rerun en curso en ese hilo, queda anotada en él. Al cerrarlo
+  (``terminar_rerun``) se escribe una línea JSON en el log.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# Límites de los buckets en segundos (los de los clientes de Prometheus, más finos abajo)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ARCHIVO = os.environ.get("ESTELA_METRICAS_ARCHIVO")
+ESCRIBIR_CADA = float(os.environ.get("ESTELA_METRICAS_CADA", "15"))
+
+
+class _Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.cuentas = [0] * len(buckets)
+        self.suma = 0.0
+        self.n = 0
+        # Últimas duraciones, para percentiles exactos en el panel de administración
+        self.recientes = deque(maxlen=500)
+
+    def observar(self, segundos):
+        for i, limite in enumerate(self.buckets):
+            if segundos <= limite:
+                self.cuentas[i] += 1
+                break
+        self.suma += segundos
+        self.n += 1
+        self.recientes.append(segundos)
+
+
+class Metricas:
+    def __init__(self, buckets=BUCKETS, archivo=ARCHIVO, escribir_cada=ESCRIBIR_CADA):
+        self.buckets = buckets
+        self.archivo = archivo
+        self.escribir_cada = escribir_cada
+        self._histogramas = {}
+        self._reruns = 0
+        self._fuentes = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._escrito = 0.0
+
+    @contextmanager
+    def tramo(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio)
+
+    def observar(self, nombre, segundos):
+        with self._lock:
+            if nombre not in self._histogramas:
+                self._histogramas[nombre] = _Histograma(self.buckets)
+            self._histogramas[nombre].observar(segundos)
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is not None:
+            rerun[nombre] = rerun.get(nombre, 0.0) + segundos
+
+    def agregar_fuente(self, fuente):
+        """``fuente()`` devuelve un dict nombre -> valor que se exporta como gauge."""
+        with self._lock:
+            self._fuentes.append(fuente)
+
+    def iniciar_rerun(self):
+        self._local.rerun = {}
+        self._local.inicio = time.perf_counter()
+
+    def terminar_rerun(self, **contexto):
+        """Cierra el rerun del hilo, lo deja en el log y devuelve sus tramos (en ms)."""
+        tramos = getattr(self._local, "rerun", None)
+        if tramos is None:
+            return {}
+        total = time.perf_counter() - self._local.inicio
+        self._local.rerun = None
+        self.observar("rerun", total)
+        with self._lock:
+            self._reruns += 1
+        tramos_ms = {nombre: round(s * 1e3, 2) for nombre, s in tramos.items()}
+        log.info("%s", json.dumps(
+            {"evento": "rerun", "total_ms": round(total * 1e3, 2), "tramos_ms": tramos_ms, **contexto},
+            ensure_ascii=False, default=str,
+        ))
+        if self.archivo and time.monotonic() - self._escrito >= self.escribir_cada:
+            self.escribir(self.archivo)
+        return tramos_ms
+
+    def resumen(self):
+        """Por tramo: cantidad, promedio y percentiles 50/95 de las últimas duraciones (ms)."""
+        with self._lock:
+            filas = {}
+            for nombre, h in self._histogramas.items():
+                recientes = sorted(h.recientes)
+                filas[nombre] = {
+                    "n": h.n,
+                    "promedio_ms": h.suma / h.n * 1e3,
+                    "p50_ms": recientes[len(recientes) // 2] * 1e3,
+                    "p95_ms": recientes[min(len(recientes) - 1, int(len(recientes) * 0.95))] * 1e3,
+                }
+            return filas
+
+    def prometheus(self):
+        """Texto de exposición de Prometheus con los histogramas y los gauges de las fuentes."""
+        lineas = [
+            "# HELP estela_tramo_segundos Duración de cada etapa de un rerun.",
+            "# TYPE estela_tramo_segundos histogram",
+        ]
+        with self._lock:
+            for nombre, h in sorted(self._histogramas.items()):
+                acumulado = 0
+                for limite, cuenta in zip(h.buckets, h.cuentas):
+                    acumulado += cuenta
+                    lineas.append(f'estela_tramo_segundos_bucket{{tramo="{nombre}",le="{limite}"}} {acumulado}')
+                lineas.append(f'estela_tramo_segundos_bucket{{tramo="{nombre}",le="+Inf"}} {h.n}')
+                lineas.append(f'estela_tramo_segundos_sum{{tramo="{nombre}"}} {h.suma:.6f}')
+                lineas.append(f'estela_tramo_segundos_count{{tramo="{nombre}"}} {h.n}')
+            lineas += ["# TYPE estela_reruns_total counter", f"estela_reruns_total {self._reruns}"]
+            fuentes = list(self._fuentes)
+        for fuente in fuentes:
+            for nombre, valor in fuente().items():
+                lineas += [f"# TYPE {nombre} gauge", f"{nombre} {valor}"]
+        return "\n".join(lineas) + "\n"
+
+    def escribir(self, ruta):
+        # Temporal y reemplazo: el colector nunca lee un archivo a medias
+        tmp = f"{ruta}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, ruta)
+        self._escrito = time.monotonic()
+
+
+# Una sola instancia por proceso: la comparten todas las sesiones
+METRICAS = Metricas()
@@ -0,0 +1,251 @@
+"""Motor de búsqueda sin Streamlit: de una ``Consulta`` a posiciones de fila.
+
+Reúne lo que antes estaba entre los widgets de la app: qué columnas se buscan
+según las opciones, cómo se combinan texto, libros, fichas y facetas, el
+orden por relevancia y la caché compartida. La app, los benchmarks y
+cualquier otro cliente usan lo mismo::
+
+    datos = DatasetCargado(cargar_snapshot(), "Primaria")
+    motor = Motor(datos)
+    filas = motor.filas(Consulta(contenido="fracciones", grados=("5° grado",)))
+"""
+from dataclasses import dataclass, fields
+from typing import Optional
+
+import numpy as np
+
+from .consultas import clave_de_consulta
+from .indice_texto import tokenizar
+from .metricas import METRICAS
+from .normalizacion import normalizar
+from .ranking import ordenar_por_relevancia
+
+
+@dataclass(frozen=True)
+class Consulta:
+    contenido: str = ""               # frase del programa
+    rie: str = ""                     # frase en la columna RIE
+    difuso: bool = False              # tolerar errores de tipeo
+    por_relevancia: bool = False      # ordenar por BM25 en vez de por planilla
+    grados: tuple = ()
+    espacios: tuple = ()
+    unidades: tuple = ()
+    libros: tuple = ()
+    pag_desde: Optional[int] = None   # rango de páginas de los libros elegidos
+    pag_hasta: Optional[int] = None
+    tipos_recurso: tuple = ()         # nombres de ``recursos.TIPOS``
+    recurso: str = ""                 # título de ficha o videolección
+
+    @classmethod
+    def desde_dict(cls, valores):
+        """Consulta con los campos conocidos de ``valores``; las listas pasan a tuplas."""
+        nombres = {f.name for f in fields(cls)}
+        return cls(**{
+            k: tuple(v) if isinstance(v, list) else v
+            for k, v in valores.items() if k in nombres and v is not None
+        })
+
+
+class ParametroInvalido(ValueError):
+    """Un parámetro de la URL con un valor que no se puede interpretar."""
+
+
+def entero_de_params(params, nombre, defecto=None):
+    """Parámetro ``nombre`` como entero; vacío o ausente, ``defecto``."""
+    valor = params.get(nombre)
+    if valor in (None, ""):
+        return defecto
+    try:
+        return int(valor)
+    except ValueError:
+        raise ParametroInvalido(f"'{nombre}' tiene que ser un número entero")
+
+
+def _bandera(params, nombre):
+    return params.get(nombre, "").lower() in ("1", "true", "si", "sí")
+
+
+def consulta_desde_params(params):
+    """``Consulta`` a partir de los parámetros de una URL (con ``get`` y ``getlist``)."""
+    return Consulta.desde_dict({
+        "contenido": params.get("contenido", ""),
+        "rie": params.get("rie", ""),
+        "difuso": _bandera(params, "difuso"),
+        "por_relevancia": _bandera(params, "por_relevancia"),
+        "grados": params.getlist("grado"),
+        "espacios": params.getlist("espacio"),
+        "unidades": params.getlist("unidad"),
+        "libros": params.getlist("libro"),
+        "pag_desde": entero_de_params(params, "pag_desde"),
+        "pag_hasta": entero_de_params(params, "pag_hasta"),
+        "tipos_recurso": params.getlist("tipo"),
+        "recurso": params.get("recurso", ""),
+    })
+
+
+def params_de_consulta(consulta, dataset=None):
+    """Inversa de ``consulta_desde_params``: pares para armar una URL."""
+    params = [("dataset", dataset)] if dataset else []
+    for campo in ("contenido", "rie", "recurso", "pag_desde", "pag_hasta"):
+        valor = getattr(consulta, campo)
+        if valor not in (None, ""):
+            params.append((campo, valor))
+    for campo in ("difuso", "por_relevancia"):
+        if getattr(consulta, campo):
+            params.append((campo, "1"))
+    for campo, nombre in (("grados", "grado"), ("espacios", "espacio"), ("unidades", "unidad"),
+                          ("libros", "libro"), ("tipos_recurso", "tipo")):
+        params.extend((nombre, v) for v in getattr(consulta, campo))
+    return params
+
+
+class Motor:
+    """Búsquedas sobre un ``DatasetCargado``; opcionalmente con una ``CacheConsultas``.
+
+    ``nombre`` distingue en la caché conjuntos que podrían compartir versión.
+    Con ``previos`` (un dict que el cliente conserva entre consultas, por
+    ejemplo uno por sesión) cada búsqueda de texto parte de las filas de la
+    anterior si el término la extiende: es lo que hace barata la búsqueda
+    mientras se escribe (ver ``IndiceTexto.buscar_incremental``).
+    """
+
+    def __init__(self, datos, cache=None, nombre="", previos=None):
+        self.datos = datos
+        self.cache = cache
+        self.nombre = nombre
+        self.previos = previos
+        # La base se pide varias veces por consulta (conteos de cada faceta y filas)
+        self._bases = {}
+
+    def busquedas(self, consulta):
+        """Pares (columna, término) que se buscan en los índices de texto."""
+        datos = self.datos
+        busquedas = []
+        if consulta.contenido:
+            busquedas.append((datos.t_col, consulta.contenido))
+            # Con errores de tipeo, la frase del programa se busca también en la Unidad
+            if consulta.difuso:
+                busquedas.append((datos.unidad_col, consulta.contenido))
+        if consulta.rie:
+            busquedas.append((datos.rie_col, consulta.rie))
+        return busquedas
+
+    def filtros(self, consulta):
+        """Selección de cada faceta (columna -> valores)."""
+        return {
+            self.datos.grado_col: list(consulta.grados),
+            self.datos.espacio_col: list(consulta.espacios),
+            self.datos.unidad_col: list(consulta.unidades),
+        }
+
+    def _libros(self, consulta):
+        return list(consulta.libros) if self.datos.libros is not None else []
+
+    def _paginas(self, consulta):
+        return (consulta.pag_desde, consulta.pag_hasta) if self._libros(consulta) else (None, None)
+
+    def _clave(self, consulta, facetas=False):
+        filtros = {"libros": self._libros(consulta), "tipos": list(consulta.tipos_recurso)}
+        opciones = (consulta.difuso, *self._paginas(consulta))
+        if facetas:
+            filtros.update(self.filtros(consulta))
+            opciones += (self._por_relevancia(consulta),)
+        return clave_de_consulta(
+            self.nombre, self.datos.version,
+            self.busquedas(consulta) + [("recurso", consulta.recurso)], opciones, filtros,
+        )
+
+    def _cacheado(self, clave, calcular):
+        if self.cache is None:
+            return calcular()
+        return self.cache.obtener(clave, calcular)
+
+    def _por_relevancia(self, consulta):
+        return bool(consulta.por_relevancia and self.busquedas(consulta))
+
+    def _buscar_texto(self, col, termino, difuso):
+        indice = self.datos.indices[col]
+        if difuso:
+            return indice.buscar_difuso(termino)
+        if self.previos is None:
+            return indice.buscar(termino)
+        clave = (self.nombre, self.datos.version, col)
+        filas = indice.buscar_incremental(termino, self.previos.get(clave))
+        self.previos[clave] = (termino, filas)
+        return filas
+
+    def _calcular_base(self, consulta):
+        datos = self.datos
+        base = None
+        with METRICAS.tramo("texto"):
+            conds = [self._buscar_texto(col, t, consulta.difuso) for col, t in self.busquedas(consulta)]
+        if conds:
+            posiciones = conds[0]
+            for c in conds[1:]:
+                posiciones = np.union1d(posiciones, c)
+            base = datos.facetas.mascara_de_posiciones(posiciones)
+        libros = self._libros(consulta)
+        if libros:
+            m = datos.libros.mascara(libros, *self._paginas(consulta))
+            base = m if base is None else np.logical_and(base, m, out=base)
+        m = datos.recursos.mascara(consulta.tipos_recurso, consulta.recurso)
+        if m is not None:
+            base = m if base is None else np.logical_and(base, m, out=base)
+        return np.arange(len(datos.df)) if base is None else np.flatnonzero(base)
+
+    def base(self, consulta):
+        """Máscara de los filtros que no son Grado/Espacio/Unidad (texto, libros,
+        fichas), o ``None`` si no hay ninguno activo."""
+        if not (self.busquedas(consulta) or self._libros(consulta)
+                or consulta.tipos_recurso or consulta.recurso):
+            return None
+        clave = self._clave(consulta)
+        if clave not in self._bases:
+            posiciones = self._cacheado(clave, lambda: self._calcular_base(consulta))
+            self._bases[clave] = self.datos.facetas.mascara_de_posiciones(posiciones)
+        return self._bases[clave]
+
+    def filas(self, consulta):
+        """Posiciones de las filas que cumplen la consulta, en el orden a mostrar."""
+        def calcular():
+            # Texto y facetas se combinan en una sola máscara: un único corte del DataFrame
+            base = self.base(consulta)
+            with METRICAS.tramo("facetas"):
+                mask = self.datos.facetas.combinar(self.filtros(consulta), base)
+                filas = np.arange(len(self.datos.df)) if mask is None else np.flatnonzero(mask)
+            # Sin esta opción se respeta el orden de la planilla
+            if self._por_relevancia(consulta):
+                with METRICAS.tramo("relevancia"):
+                    filas = ordenar_por_relevancia(filas, [
+                        self.datos.indices[col].puntajes(t, consulta.difuso)
+                        for col, t in self.busquedas(consulta)
+                    ])
+            return filas
+        return self._cacheado(self._clave(consulta, facetas=True), calcular)
+
+    def conteos(self, consulta, col):
+        """Filas que daría cada valor de la faceta ``col`` con los demás filtros."""
+        base = self.base(consulta)
+        with METRICAS.tramo("conteos"):
+            return self.datos.facetas.conteos(col, self.filtros(consulta), base)
+
+    def resaltados(self, consulta):
+        """Términos normalizados a resaltar en cada columna de texto buscada.
+
+        Con ``difuso`` se suman cada palabra y las del vocabulario que se le
+        parecen, que son las que hicieron coincidir la fila.
+        """
+        terminos = {}
+        for col, termino in self.busquedas(consulta):
+            propio = normalizar(termino)
+            lista = terminos.setdefault(col, [propio])
+            if consulta.difuso:
+                indice = self.datos.indices[col]
+                for q in set(tokenizar(propio)):
+                    lista.append(q)
+                    lista.extend(indice.vocabulario[tid] for tid in indice.trigramas.similares(q))
+        return terminos
+
+    def opciones(self, consulta, col):
+        """Valores de la faceta ``col`` compatibles con lo elegido antes (en cascada)."""
+        return self.datos.facetas.opciones(col, self.filtros(consulta))
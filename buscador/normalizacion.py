@@ -0,0 +1,54 @@
+"""Normalización de texto para comparar sin distinguir mayúsculas ni tildes.
+
+Los datos y las consultas pasan por la misma función ``normalizar``: las
+columnas de búsqueda se normalizan una vez al cargar el snapshot (columnas
+"sombra" con prefijo ``_norm_``) y en cada consulta solo se normaliza el
+término escrito por el usuario.
+"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+PREFIJO = "_norm_"
+
+# Marcas combinantes (tildes, diéresis, etc.), salvo la virgulilla de la ñ
+_MARCAS = re.compile(r"[\u0300-\u0302\u0304-\u036f]|(?<!n)\u0303")
+
+
+def normalizar(texto):
+    """ "NUMERACIÓN" -> "numeracion", "Pingüino" -> "pinguino", "AÑO" -> "año"."""
+    texto = unicodedata.normalize("NFD", texto.casefold())
+    return unicodedata.normalize("NFC", _MARCAS.sub("", texto))
+
+
+def columna_normalizada(col):
+    return PREFIJO + col
+
+
+def columnas_visibles(df):
+    return [c for c in df.columns if not c.startswith(PREFIJO)]
+
+
+def agregar_columnas_normalizadas(df, columnas, anterior=None, origen=None):
+    """Agrega a ``df`` una columna sombra normalizada por cada columna indicada.
+
+    Con ``anterior`` (el DataFrame del snapshot previo, con sus columnas sombra)
+    y ``origen`` (ver ``huellas.emparejar``), las filas que no cambiaron copian
+    su valor normalizado y solo se normalizan las demás.
+    """
+    for col in columnas:
+        serie = df[col]
+        if anterior is None:
+            # Muchas celdas se repiten (Unidad curricular): se normaliza cada valor una vez
+            mapa = {v: normalizar(v) for v in serie.dropna().unique()}
+            df[columna_normalizada(col)] = serie.map(mapa)
+            continue
+        valores = anterior[columna_normalizada(col)].to_numpy(dtype=object)[np.maximum(origen, 0)]
+        cambiadas = np.flatnonzero(origen < 0)
+        valores[cambiadas] = [
+            normalizar(v) if isinstance(v, str) else None for v in serie.to_numpy(dtype=object)[cambiadas]
+        ]
+        df[columna_normalizada(col)] = pd.Series(valores, index=df.index, dtype=serie.dtype)
+    return df
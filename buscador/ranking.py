@@ -0,0 +1,23 @@
+"""Orden por relevancia de un conjunto de filas ya filtrado."""
+import numpy as np
+
+
+def ordenar_por_relevancia(filas, puntajes_por_campo):
+    """Reordena ``filas`` (ordenadas) de mayor a menor puntaje.
+
+    ``puntajes_por_campo`` es una lista de pares ``(filas, puntajes)`` como los
+    de ``IndiceTexto.puntajes``; los puntajes de distintos campos se suman. Las
+    filas sin puntaje quedan al final y los empates conservan el orden de la
+    planilla. Se ordenan todas: el total, el paginado y la exportación las
+    usan enteras.
+    """
+    total = np.zeros(len(filas), dtype=np.float32)
+    for filas_campo, puntajes in puntajes_por_campo:
+        if len(filas) == 0 or len(filas_campo) == 0:
+            continue
+        idx = np.searchsorted(filas, filas_campo)
+        validas = idx < len(filas)
+        validas[validas] = filas[idx[validas]] == filas_campo[validas]
+        np.add.at(total, idx[validas], puntajes[validas])
+
+    return filas[np.argsort(-total, kind="stable")]
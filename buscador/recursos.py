@@ -0,0 +1,161 @@
+"""Tabla de fichas y videolecciones con un índice muchos a muchos.
+
+En la planilla, los códigos de tipo ("Los números naturales_O", "_E", "_I")
+están en la columna de Fichas. La columna Videolecciones trae solo títulos,
+uno por línea. Las dos se parsean una vez al cargar en una tabla
+(título, tipo, fila de origen). De esa tabla sale:
+
+* una máscara de filas por tipo, para filtros como "filas con una ficha
+  estratégica";
+* listas de filas por recurso (formato CSR);
+* un ``IndiceTexto`` sobre los títulos, para buscar por título de recurso sin
+  recorrer las celdas con expresiones regulares en cada rerun.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from .huellas import destinos
+from .indice_texto import IndiceTexto
+from .normalizacion import normalizar
+
+TIPOS = {
+    "I": "Ficha informativa",
+    "O": "Ficha operativa",
+    "E": "Ficha estratégica",
+    "V": "Videolección",
+}
+
+# "Título_O", "Título 2_O", "Título_2_O", "Título_O_2", "Título O2", "Título E.pdf".
+# En una misma línea puede haber varias fichas: un código con guion bajo
+# ("_O") termina la ficha aunque la siga un solo espacio; uno separado con
+# espacio (" O2") necesita dos, porque "o" y "e" también son palabras del título
+_FICHA = re.compile(
+    r"(?P<titulo>\S.*?)\s*(?:(?P<guion>_)|\s)\s*(?:(?P<n1>\d)_)?(?P<tipo>[IOEioe])(?:_?(?P<n2>\d))?"
+    r"(?:\.pdf|[./])?(?=\s{2,}|\s*$|(?(guion)\s|(?!)))"
+)
+
+
+def _titulo(texto, numero=None):
+    titulo = " ".join(texto.replace("_", " ").split())
+    return f"{titulo} {numero}" if numero else titulo
+
+
+def parsear_fichas(texto):
+    """Pares ``(título, tipo)`` de una celda de Fichas; sin código, el tipo es ``None``."""
+    if not isinstance(texto, str):
+        return []
+    recursos = []
+    for linea in texto.splitlines():
+        linea = linea.strip()
+        if not linea:
+            continue
+        fichas = list(_FICHA.finditer(linea))
+        if not fichas:
+            recursos.append((_titulo(linea), None))
+        for m in fichas:
+            recursos.append((_titulo(m["titulo"], m["n1"] or m["n2"]), m["tipo"].upper()))
+    return recursos
+
+
+def parsear_videos(texto):
+    """Títulos de una celda de Videolecciones; las aclaraciones entre paréntesis no cuentan."""
+    if not isinstance(texto, str):
+        return []
+    return [
+        (_titulo(linea), "V")
+        for linea in (l.strip() for l in texto.splitlines())
+        if linea and not linea.startswith("(")
+    ]
+
+
+def tabla_de_recursos(df, fichas_col=None, videos_col=None):
+    """Un registro (título, tipo, fila) por cada recurso citado en cada fila."""
+    registros = []
+    for col, parsear in ((fichas_col, parsear_fichas), (videos_col, parsear_videos)):
+        if col is None:
+            continue
+        por_valor = {v: parsear(v) for v in df[col].dropna().unique()}
+        for fila, valor in enumerate(df[col]):
+            registros.extend((t, tipo, fila) for t, tipo in por_valor.get(valor, ()))
+    tabla = pd.DataFrame(registros, columns=["titulo", "tipo", "fila"])
+    tabla["fila"] = tabla["fila"].astype(np.int32)
+    return tabla
+
+
+class IndiceRecursos:
+    def __init__(self, df, fichas_col=None, videos_col=None, tabla=None):
+        self.n = len(df)
+        self.fichas_col = fichas_col
+        self.videos_col = videos_col
+        self.tabla = tabla_de_recursos(df, fichas_col, videos_col) if tabla is None else tabla
+
+        # Un recurso es un par (título, tipo) normalizado; sus filas quedan en CSR
+        normalizados = {t: normalizar(t) for t in self.tabla["titulo"].unique()}
+        # Sin recursos, map con un dict vacío devuelve float64: se fuerza object
+        titulos = self.tabla["titulo"].map(normalizados).astype(object)
+        claves = titulos + "\x00" + self.tabla["tipo"].fillna("").astype(object)
+        codigos, unicos = pd.factorize(claves)
+        orden = np.lexsort((self.tabla["fila"].to_numpy(), codigos))
+        self.filas = self.tabla["fila"].to_numpy()[orden]
+        self.inicios = np.searchsorted(codigos[orden], np.arange(len(unicos) + 1)).astype(np.int32)
+        primeros = self.inicios[:-1]
+        self.titulos = self.tabla["titulo"].to_numpy()[orden][primeros]
+        self.tipos = self.tabla["tipo"].to_numpy()[orden][primeros]
+        self.indice_titulos = IndiceTexto([normalizados[t] for t in self.titulos])
+
+        self.mascaras = {}
+        for tipo in TIPOS:
+            mascara = np.zeros(self.n, dtype=bool)
+            mascara[self.tabla.loc[self.tabla["tipo"] == tipo, "fila"].to_numpy()] = True
+            if mascara.any():
+                self.mascaras[tipo] = mascara
+
+    def actualizar(self, df, origen):
+        """Índice nuevo para ``df`` que solo parsea las filas sin ``origen``
+        (ver ``huellas.emparejar``); este índice no se modifica."""
+        tabla = self.tabla.assign(fila=destinos(origen, self.n)[self.tabla["fila"].to_numpy()])
+        tabla = tabla[tabla["fila"] >= 0]
+        cambiadas = np.flatnonzero(origen < 0)
+        nuevas = tabla_de_recursos(df.iloc[cambiadas], self.fichas_col, self.videos_col)
+        nuevas["fila"] = cambiadas[nuevas["fila"].to_numpy()]
+        tabla = pd.concat([tabla, nuevas], ignore_index=True)
+        tabla["fila"] = tabla["fila"].astype(np.int32)
+        return IndiceRecursos(df, self.fichas_col, self.videos_col, tabla=tabla)
+
+    @property
+    def nbytes(self):
+        return (
+            self.filas.nbytes + self.inicios.nbytes + self.indice_titulos.nbytes
+            + sum(m.nbytes for m in self.mascaras.values())
+        )
+
+    def opciones(self):
+        return [TIPOS[t] for t in self.mascaras]
+
+    def filas_de(self, recursos):
+        """Filas que citan alguno de los recursos (ids de ``titulos``)."""
+        if len(recursos) == 0:
+            return np.empty(0, dtype=np.int32)
+        partes = [self.filas[self.inicios[r]:self.inicios[r + 1]] for r in recursos]
+        return np.unique(np.concatenate(partes))
+
+    def mascara(self, tipos=(), termino=""):
+        """Filas con algún recurso de los tipos elegidos cuyo título contiene ``termino``.
+
+        ``tipos`` son nombres de ``TIPOS`` ("Ficha estratégica"); vacío no filtra por
+        tipo. Devuelve ``None`` si no hay ningún filtro activo.
+        """
+        codigos = [c for c, nombre in TIPOS.items() if nombre in tipos]
+        if not codigos and not termino:
+            return None
+        if not termino:
+            return np.logical_or.reduce([self.mascaras[c] for c in codigos if c in self.mascaras]
+                                        + [np.zeros(self.n, dtype=bool)])
+        recursos = self.indice_titulos.buscar(termino)
+        if codigos:
+            recursos = recursos[np.isin(self.tipos[recursos], codigos)]
+        mascara = np.zeros(self.n, dtype=bool)
+        mascara[self.filas_de(recursos)] = True
+        return mascara
@@ -0,0 +1,63 @@
+"""Dónde coincidió la búsqueda dentro de cada celda, para resaltarlo en la grilla.
+
+Se calcula solo para las filas de la página que se muestra, con una única
+expresión compilada por columna (todos los términos en una alternativa) que
+recorre el texto ya normalizado de la columna sombra. Las celdas sin
+coincidencia se descartan con esa pasada. En las que coinciden, cada posición
+del texto normalizado se traduce a la del texto original, que puede ser más
+largo (tildes como caracteres aparte) o más corto.
+
+Los tramos se devuelven en unidades UTF-16, que es como cuenta JavaScript
+las posiciones de un string.
+"""
+import json
+import re
+from functools import lru_cache
+
+from .normalizacion import normalizar
+
+
+@lru_cache(maxsize=4096)
+def _normalizar_caracter(c):
+    return normalizar(c)
+
+
+def _origenes(texto):
+    """Para cada carácter de ``normalizar(texto)``, dónde empieza en ``texto`` el
+    carácter del que sale (en UTF-16); al final, el largo de ``texto``."""
+    origenes, pos = [], 0
+    for c in texto:
+        origenes.extend([pos] * len(_normalizar_caracter(c)))
+        pos += 2 if ord(c) > 0xFFFF else 1
+    origenes.append(pos)
+    return origenes
+
+
+def buscador(terminos):
+    """Expresión que encuentra cualquiera de ``terminos`` (ya normalizados), o None."""
+    terminos = sorted({t for t in terminos if t.strip()}, key=len, reverse=True)
+    if not terminos:
+        return None
+    return re.compile("|".join(re.escape(t) for t in terminos))
+
+
+def tramos(texto, normalizado, patron):
+    """Tramos ``[inicio, fin)`` de ``texto`` donde ``patron`` coincide con ``normalizado``."""
+    if patron is None or not isinstance(texto, str) or not isinstance(normalizado, str):
+        return []
+    coincidencias = [m.span() for m in patron.finditer(normalizado)]
+    if not coincidencias:
+        return []
+    origenes = _origenes(texto)
+    if len(origenes) != len(normalizado) + 1:
+        # La normalización por carácter no siempre da lo mismo que la del texto
+        # entero (una ñ escrita como n + virgulilla): se normaliza otra vez así
+        normalizado = "".join(_normalizar_caracter(c) for c in texto)
+        coincidencias = [m.span() for m in patron.finditer(normalizado)]
+    return [[origenes[i], origenes[j]] for i, j in coincidencias]
+
+
+def tramos_de_pagina(textos, normalizados, terminos):
+    """Tramos de cada celda de la página como JSON, para la grilla."""
+    patron = buscador(terminos)
+    return [json.dumps(tramos(t, n, patron)) for t, n in zip(textos, normalizados)]
@@ -0,0 +1,23 @@
+"""Paginado y materialización de resultados a partir de posiciones de fila."""
+import pandas as pd
+
+
+def total_paginas(total, por_pagina):
+    return max(1, -(-total // por_pagina))
+
+
+def paginar(filas, pagina, por_pagina):
+    """Posiciones de la página pedida, acotando ``pagina`` al rango válido.
+
+    Devuelve ``(posiciones_de_la_pagina, pagina_usada)``.
+    """
+    pagina = min(max(pagina, 0), total_paginas(len(filas), por_pagina) - 1)
+    inicio = pagina * por_pagina
+    return filas[inicio:inicio + por_pagina], pagina
+
+
+def materializar(df, filas, columnas):
+    """Copia de ``df`` con solo las filas y columnas (posiciones) indicadas."""
+    data = df.iloc[filas, columnas]
+    data.index = pd.RangeIndex(len(data))
+    return data
@@ -0,0 +1,128 @@
+"""Copia local (snapshot) de la planilla publicada.
+
+La planilla se guarda en disco en formato Parquet junto a un archivo JSON con
+los metadatos HTTP (ETag / Last-Modified). Al arrancar se lee el snapshot del
+disco y solo se vuelve a consultar la red cuando pasó ``max_edad``; en ese caso
+la descarga es condicional, así que si la planilla no cambió el servidor
+responde 304 y no se transfiere nada. Si la red falla se sigue usando la
+última copia buena.
+
+La URL y la carpeta se pueden cambiar con ``ESTELA_CSV_URL`` y
+``ESTELA_CACHE_DIR`` (por ejemplo para probar contra un servidor HTTP local).
+"""
+import hashlib
+import io
+import logging
+import os
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+
+import pandas as pd
+
+from .archivos import escribir_atomico, guardar_meta, leer_meta
+
+CSV_URL = os.environ.get(
+    "ESTELA_CSV_URL",
+    "https://docs.google.com/spreadsheets/d/e/"
+    "2PACX-1vQHZhdhfG9G5jCe2Tm5OpR6cY8gNk2aduQsJnaaVHR0sJg9VcCzjTNLDUVXzB8REA"
+    "/pub?output=csv",
+)
+CACHE_DIR = os.environ.get(
+    "ESTELA_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"),
+)
+# Segundos durante los que el snapshot se usa sin preguntar al servidor
+REVALIDAR_CADA = int(os.environ.get("ESTELA_REVALIDAR_CADA", "300"))
+TIMEOUT = 20
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    df: pd.DataFrame
+    version: str          # hash del CSV descargado
+    etag: str | None
+    last_modified: str | None
+    validado: float       # momento (epoch) de la última validación contra el servidor
+    origen: str           # "red", "disco" u "obsoleto" (red caída, copia vieja)
+
+
+def limpiar_columnas(df):
+    df.columns = df.columns.str.strip().str.replace("\n", " ").str.replace("\r", " ")
+    return df
+
+
+def _rutas(url, cache_dir):
+    base = "snapshot-" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, base + ".parquet"), os.path.join(cache_dir, base + ".json")
+
+
+def _desde_disco(ruta_parquet, meta, origen):
+    return Snapshot(
+        df=pd.read_parquet(ruta_parquet),
+        version=meta["version"],
+        etag=meta.get("etag"),
+        last_modified=meta.get("last_modified"),
+        validado=meta["validado"],
+        origen=origen,
+    )
+
+
+def cargar_snapshot(url=CSV_URL, cache_dir=CACHE_DIR, max_edad=REVALIDAR_CADA, timeout=TIMEOUT):
+    """Devuelve el snapshot de ``url``, descargándolo solo si cambió."""
+    ruta_parquet, ruta_meta = _rutas(url, cache_dir)
+    meta = leer_meta(ruta_meta)
+    hay_local = meta is not None and os.path.exists(ruta_parquet)
+
+    if hay_local and time.time() - meta["validado"] < max_edad:
+        return _desde_disco(ruta_parquet, meta, "disco")
+
+    headers = {}
+    if hay_local:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as resp:
+            cuerpo = resp.read()
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and hay_local:
+            meta["validado"] = time.time()
+            guardar_meta(ruta_meta, meta)
+            return _desde_disco(ruta_parquet, meta, "disco")
+        if hay_local:
+            log.warning("No se pudo revalidar %s (HTTP %s), se usa la copia local", url, e.code)
+            return _desde_disco(ruta_parquet, meta, "obsoleto")
+        raise
+    except OSError as e:
+        if hay_local:
+            log.warning("No se pudo revalidar %s (%s), se usa la copia local", url, e)
+            return _desde_disco(ruta_parquet, meta, "obsoleto")
+        raise
+
+    version = hashlib.sha256(cuerpo).hexdigest()[:16]
+    nuevo_meta = {
+        "url": url,
+        "version": version,
+        "etag": etag,
+        "last_modified": last_modified,
+        "validado": time.time(),
+    }
+
+    # El servidor no siempre manda validadores: si el contenido es el mismo no se reescribe
+    if hay_local and version == meta["version"]:
+        guardar_meta(ruta_meta, nuevo_meta)
+        return _desde_disco(ruta_parquet, nuevo_meta, "disco")
+
+    df = limpiar_columnas(pd.read_csv(io.BytesIO(cuerpo), dtype=str))
+    os.makedirs(cache_dir, exist_ok=True)
+    escribir_atomico(ruta_parquet, lambda tmp: df.to_parquet(tmp, index=False))
+    guardar_meta(ruta_meta, nuevo_meta)
+    return Snapshot(df, version, etag, last_modified, nuevo_meta["validado"], "red")
@@ -0,0 +1,11 @@
+import pytest
+
+from buscador.ingesta import consolidar
+
+
+@pytest.fixture(scope="session")
+def consolidado(tmp_path_factory):
+    """Carpeta con el consolidado de los libros .xlsx del repo."""
+    cache_dir = str(tmp_path_factory.mktemp("consolidado"))
+    consolidar(cache_dir=cache_dir, salida=lambda *_: None)
+    return cache_dir
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+from urllib.parse import urlencode
+
+import pytest
+from starlette.datastructures import QueryParams
+
+from buscador.motor import Consulta, ParametroInvalido, consulta_desde_params, params_de_consulta
+
+
+def test_importar_la_api_no_crea_el_registro():
+    codigo = (
+        "import threading, buscador.api, buscador.arranque as a; "
+        "assert a._registro is None; "
+        "assert not any(t.name == 'estela-refresco' for t in threading.enumerate())"
+    )
+    subprocess.run([sys.executable, "-c", codigo], check=True)
+
+
+def test_params_ida_y_vuelta():
+    consulta = Consulta(
+        contenido="fracciones", difuso=True, grados=("5° grado", "6° grado"),
+        libros=("Gira molinete 1",), pag_desde=10, pag_hasta=20, tipos_recurso=("Ficha operativa",),
+    )
+    params = QueryParams(urlencode(params_de_consulta(consulta, "Primaria 2025")))
+    assert params["dataset"] == "Primaria 2025"
+    assert consulta_desde_params(params) == consulta
+
+
+def test_entero_invalido():
+    with pytest.raises(ParametroInvalido):
+        consulta_desde_params(QueryParams("pag_desde=diez"))
@@ -0,0 +1,33 @@
+from buscador import arranque, ingesta
+
+
+class RegistroFalso:
+    def __init__(self):
+        self.cargados = []
+
+    def nombres(self):
+        return ["Primaria (planilla publicada)"]
+
+    def obtener(self, nombre):
+        self.cargados.append(nombre)
+
+
+def test_precalentar_consolida_antes_de_cargar(monkeypatch):
+    pasos = []
+    registro = RegistroFalso()
+    monkeypatch.setattr(ingesta, "consolidar", lambda **_: pasos.append("consolidar"))
+    monkeypatch.setattr(arranque, "registro_compartido", lambda: pasos.append("registro") or registro)
+    tiempos = arranque.precalentar()
+    assert pasos == ["consolidar", "registro"]
+    assert registro.cargados == ["Primaria (planilla publicada)"]
+    assert "consolidado" in tiempos
+
+
+def test_precalentar_sigue_si_no_puede_consolidar(monkeypatch):
+    def falla(**_):
+        raise OSError("sin libros")
+    registro = RegistroFalso()
+    monkeypatch.setattr(ingesta, "consolidar", falla)
+    monkeypatch.setattr(arranque, "registro_compartido", lambda: registro)
+    arranque.precalentar()
+    assert registro.cargados == ["Primaria (planilla publicada)"]
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from buscador.consultas import CacheConsultas, clave_de_consulta
+
+
+def clave(termino, version="v1", filtros=None):
+    return clave_de_consulta("planilla", version, [("Contenidos", termino)], (False,), filtros)
+
+
+def test_clave_sin_mayusculas_ni_tildes():
+    assert clave("Fracción") == clave("FRACCION") == clave("fraccion")
+
+
+def test_clave_conserva_espacios():
+    # "fraccion " es otra subcadena: no puede reutilizar el resultado de "fraccion"
+    assert clave("fraccion ") != clave("fraccion")
+
+
+def test_clave_no_depende_del_orden_de_los_filtros():
+    a = clave("x", filtros={"Grado": ["2° grado", "1° grado"], "Espacio": ["E"], "Unidad": []})
+    b = clave("x", filtros={"Espacio": ["E"], "Grado": ["1° grado", "2° grado"]})
+    assert a == b
+
+
+def test_clave_distingue_version():
+    assert clave("x", "v1") != clave("x", "v2")
+
+
+def filas(n):
+    return np.arange(n, dtype=np.int64)
+
+
+def test_aciertos_y_solo_lectura():
+    cache = CacheConsultas()
+    llamadas = []
+    calcular = lambda: llamadas.append(1) or filas(10)  # noqa: E731
+    primero = cache.obtener("a", calcular)
+    segundo = cache.obtener("a", calcular)
+    assert primero is segundo
+    assert len(llamadas) == 1
+    assert cache.estadisticas()["aciertos"] == 1
+    with pytest.raises(ValueError):
+        primero[0] = 5
+
+
+def test_lru_acotada_por_bytes():
+    # Entran dos arrays de 512 KB en 1 MB
+    cache = CacheConsultas(presupuesto_mb=1)
+    n = 64 * 1024
+    cache.obtener("a", lambda: filas(n))
+    cache.obtener("b", lambda: filas(n))
+    cache.obtener("a", lambda: filas(n))   # "a" pasa a ser la más reciente
+    cache.obtener("c", lambda: filas(n))   # sale "b"
+    assert cache.estadisticas()["entradas"] == 2
+    assert cache.estadisticas()["bytes"] == 2 * n * 8
+    calculadas = []
+    cache.obtener("a", lambda: calculadas.append("a") or filas(n))
+    cache.obtener("b", lambda: calculadas.append("b") or filas(n))
+    assert calculadas == ["b"]
+
+
+def test_resultado_mas_grande_que_el_presupuesto_no_queda():
+    cache = CacheConsultas(presupuesto_mb=1)
+    cache.obtener("grande", lambda: filas(200 * 1024))
+    assert cache.estadisticas()["entradas"] == 0
+    assert cache.estadisticas()["bytes"] == 0
+
+
+def test_descartar_version():
+    cache = CacheConsultas()
+    viejas = [clave(t, "v1") for t in ("a", "b")]
+    nueva = clave("a", "v2")
+    otro = clave_de_consulta("otro", "v1", [("Contenidos", "a")])
+    for c in viejas + [nueva, otro]:
+        cache.obtener(c, lambda: filas(4))
+    cache.descartar_version("planilla", "v1")
+    estadisticas = cache.estadisticas()
+    assert estadisticas["entradas"] == 2
+    assert estadisticas["bytes"] == 2 * 4 * 8
+    calculadas = []
+    for c in viejas + [nueva, otro]:
+        cache.obtener(c, lambda: calculadas.append(c) or filas(4))
+    assert calculadas == viejas
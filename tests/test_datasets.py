@@ -0,0 +1,81 @@
+import os
+
+import pandas as pd
+import pytest
+
+from buscador.datasets import Dataset, DatasetCargado, RegistroDatasets
+from buscador.ingesta import cargar_consolidado, libros_por_defecto, nivel_de
+from buscador.snapshot import Snapshot
+
+LIBROS = [os.path.splitext(os.path.basename(r))[0] for r in libros_por_defecto()]
+NIVELES = {os.path.splitext(os.path.basename(r))[0]: nivel_de(r) for r in libros_por_defecto()}
+
+
+def snapshot(df, version="v1"):
+    return Snapshot(df=df, version=version, etag=None, last_modified=None, validado=0.0, origen="red")
+
+
+@pytest.mark.parametrize("archivo", LIBROS)
+def test_dataset_de_cada_libro(consolidado, archivo):
+    datos = DatasetCargado(cargar_consolidado(consolidado, archivo=archivo), NIVELES[archivo])
+    assert len(datos.df) > 0
+    assert set(datos.indices) == {datos.t_col, datos.rie_col, datos.unidad_col}
+
+
+def test_dataset_sin_fichas_ni_videos():
+    df = pd.DataFrame({
+        "Grado": ["1° grado", "2° grado"],
+        "Espacio": ["Científico Matemático"] * 2,
+        "Unidad curricular": ["Matemática"] * 2,
+        "Contenidos": ["Fracciones", "Números naturales"],
+        "RIE": ["Fracciones equivalentes", None],
+    })
+    datos = DatasetCargado(snapshot(df), "Primaria")
+    assert datos.recursos.opciones() == []
+    assert not datos.recursos.mascara(("Ficha operativa",), "fracciones").any()
+    assert list(datos.indices[datos.t_col].buscar("fracc")) == [0]
+
+
+def test_dataset_con_columnas_de_recursos_vacias():
+    df = pd.DataFrame({
+        "Grado": ["1° grado"],
+        "Espacio": ["Científico Matemático"],
+        "Unidad curricular": ["Matemática"],
+        "Contenidos": ["Fracciones"],
+        "RIE": [None],
+        "Fichas (Informativas, Operativas y Estratégicas)": [None],
+        "Videolecciones": [None],
+    })
+    datos = DatasetCargado(snapshot(df), "Primaria")
+    assert datos.recursos.opciones() == []
+
+
+class Fuente:
+    """Carga que cuenta los pedidos y devuelve la versión que tenga en ese momento."""
+
+    def __init__(self, df):
+        self.df = df
+        self.version = "v1"
+        self.pedidos = []
+
+    def __call__(self, **kwargs):
+        self.pedidos.append(kwargs)
+        return snapshot(self.df, self.version)
+
+
+def test_refrescar_revalida_sin_esperar_max_edad():
+    df = pd.DataFrame({
+        "Grado": ["1° grado"], "Espacio": ["E"], "Unidad curricular": ["Matemática"],
+        "Contenidos": ["Fracciones"], "RIE": [None],
+    })
+    fuente = Fuente(df)
+    registro = RegistroDatasets([Dataset("planilla", fuente, "Primaria", revalidar=True)])
+    primero = registro.obtener("planilla")
+    assert fuente.pedidos == [{}]
+
+    assert not registro.refrescar("planilla")
+    assert fuente.pedidos[-1] == {"max_edad": 0}
+
+    fuente.version = "v2"
+    assert registro.refrescar("planilla")
+    assert registro.obtener("planilla") is not primero
@@ -0,0 +1,66 @@
+"""Plantilla del sitio estático; su búsqueda (JavaScript, con node) contra la de Python."""
+import json
+import re
+import shutil
+import subprocess
+
+import pandas as pd
+import pytest
+
+from buscador.datasets import DatasetCargado
+from buscador.estatico import PLANTILLA, exportar_dataset
+from buscador.normalizacion import normalizar
+from buscador.snapshot import Snapshot
+
+NODE = shutil.which("node")
+con_node = pytest.mark.skipif(NODE is None, reason="hace falta node")
+
+
+def script():
+    """Lo del ``<script>`` de la plantilla que no toca la página: normalización e ``Indice``."""
+    with open(PLANTILLA, encoding="utf-8") as f:
+        codigo = re.search(r"<script>(.*?)</script>", f.read(), re.S).group(1)
+    return codigo[:codigo.index("let datos = null")]
+
+
+def correr(codigo, entrada):
+    programa = script() + f"\nconst entrada = {json.dumps(entrada)};\n{codigo}"
+    salida = subprocess.run([NODE, "-e", programa], capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout)
+
+
+TEXTOS = ["Straße", "STRASSE", "ﬁcha", "ΟΔΟΣ", "NUMERACIÓN", "Pingüino", "AÑO", "Año", "niño"]
+
+
+@con_node
+def test_normalizar_igual_que_python():
+    assert correr("console.log(JSON.stringify(entrada.map(normalizar)))", TEXTOS) == [normalizar(t) for t in TEXTOS]
+
+
+@con_node
+def test_buscar_igual_que_python():
+    df = pd.DataFrame({
+        "Grado": ["1° grado"] * 4,
+        "Espacio": ["Comunicación"] * 4,
+        "Unidad curricular": ["Lengua"] * 4,
+        "Contenidos": ["La calle Straße", "STRASSE", "Una ﬁcha", "Fracciones"],
+        "RIE": [None] * 4,
+    })
+    datos = DatasetCargado(Snapshot(df, "v1", None, None, 0.0, "red"), "Primaria")
+    terminos = ["straße", "STRASSE", "ss", "ficha", "ﬁ", "fracción"]
+    exportado = exportar_dataset("prueba", datos)
+    js = correr(
+        "const indice = new Indice(entrada.datos, entrada.datos.contenido);"
+        "console.log(JSON.stringify(entrada.terminos.map(t => {"
+        "  const m = indice.buscar(t); return [...m.keys()].filter(i => m[i]); })))",
+        {"datos": exportado, "terminos": terminos},
+    )
+    python = [datos.indices[datos.t_col].buscar(t).tolist() for t in terminos]
+    assert js == python
+    assert python[0] == [0, 1]
+
+
+def test_encabezados_como_texto():
+    # Los encabezados vienen de la planilla: nunca se interpretan como HTML
+    with open(PLANTILLA, encoding="utf-8") as f:
+        assert "outerHTML" not in f.read()
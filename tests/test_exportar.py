@@ -0,0 +1,100 @@
+import csv
+import io
+import socket
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from buscador.exportar import a_archivo, csv_en_bloques, xlsx_en_bloques
+
+DF = pd.DataFrame({
+    "Contenidos": ["Fracción", "Decimales\x01 con control", None, "Ñandú, \"comillas\"\ny salto"],
+    "Grado": ["1° grado", "2° grado", "3° grado", "4° grado"],
+    "_norm_Contenidos": ["fraccion", "decimales", None, "ñandu"],
+})
+COLUMNAS = np.array([0, 1])
+FILAS = np.array([3, 0, 1, 2])
+
+
+def test_csv_con_bom_y_en_bloques():
+    partes = list(csv_en_bloques(DF, FILAS, COLUMNAS, bloque=2))
+    # Encabezado y un pedazo por bloque de filas
+    assert len(partes) == 3
+    datos = b"".join(partes)
+    assert datos.startswith(b"\xef\xbb\xbf")
+    filas = list(csv.reader(io.StringIO(datos.decode("utf-8-sig"))))
+    assert filas[0] == ["Contenidos", "Grado"]
+    assert filas[1] == ["Ñandú, \"comillas\"\ny salto", "4° grado"]
+    assert [f[1] for f in filas[1:]] == ["4° grado", "1° grado", "2° grado", "3° grado"]
+
+
+def leer_xlsx(datos):
+    hoja = load_workbook(io.BytesIO(datos)).active
+    return [list(f) for f in hoja.iter_rows(values_only=True)]
+
+
+def test_xlsx_ida_y_vuelta():
+    filas = leer_xlsx(b"".join(xlsx_en_bloques(DF, FILAS, COLUMNAS, bloque=2)))
+    assert filas == [
+        ["Contenidos", "Grado"],
+        ["Ñandú, \"comillas\"\ny salto", "4° grado"],
+        ["Fracción", "1° grado"],
+        # Los caracteres de control no se admiten en XLSX: se sacan
+        ["Decimales con control", "2° grado"],
+        [None, "3° grado"],
+    ]
+
+
+def test_sin_filas():
+    assert leer_xlsx(b"".join(xlsx_en_bloques(DF, FILAS[:0], COLUMNAS))) == [["Contenidos", "Grado"]]
+    assert b"".join(csv_en_bloques(DF, FILAS[:0], COLUMNAS)).decode("utf-8-sig").strip() == "Contenidos,Grado"
+
+
+@pytest.mark.parametrize("formato", ["csv", "xlsx"])
+def test_a_archivo_igual_que_en_bloques(formato):
+    en_bloques = csv_en_bloques if formato == "csv" else xlsx_en_bloques
+    with a_archivo(formato, DF, FILAS, COLUMNAS) as f:
+        # Sin buffer: Streamlit lo acepta como io.RawIOBase y lo lee una vez
+        assert isinstance(f, io.RawIOBase)
+        datos = f.read()
+    if formato == "csv":
+        assert datos == b"".join(en_bloques(DF, FILAS, COLUMNAS))
+    else:
+        assert leer_xlsx(datos) == leer_xlsx(b"".join(en_bloques(DF, FILAS, COLUMNAS)))
+
+
+def test_export_de_la_api_no_recomprime_xlsx():
+    from buscador.api import iniciar_en_hilo
+    from buscador.datasets import Dataset, RegistroDatasets
+    from buscador.snapshot import Snapshot
+
+    df = pd.DataFrame({
+        "Grado": ["1° grado"] * 200, "Espacio": ["E"] * 200, "Unidad curricular": ["Matemática"] * 200,
+        "Contenidos": [f"Fracciones {i}" for i in range(200)], "RIE": [None] * 200,
+    })
+    snapshot = Snapshot(df, "v1", None, None, 0.0, "red")
+    registro = RegistroDatasets([Dataset("prueba", lambda: snapshot, "Primaria")])
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        puerto = s.getsockname()[1]
+    servidor = iniciar_en_hilo(registro, puerto, "127.0.0.1")
+    try:
+        for _ in range(100):
+            if servidor.started:
+                break
+            time.sleep(0.05)
+
+        def codificacion(formato):
+            pedido = urllib.request.Request(f"http://127.0.0.1:{puerto}/export?formato={formato}",
+                                            headers={"Accept-Encoding": "gzip"})
+            with urllib.request.urlopen(pedido, timeout=10) as r:
+                r.read()
+                return r.headers.get("Content-Encoding")
+        assert codificacion("csv") == "gzip"
+        assert codificacion("xlsx") is None
+    finally:
+        servidor.should_exit = True
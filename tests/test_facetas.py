@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from buscador.facetas import IndiceFacetas
+
+COLUMNAS = ("Grado", "Espacio", "Unidad")
+
+
+def indice():
+    # "U2" aparece con 1° (fila 1) y con Lengua (fila 2), pero nunca con los dos
+    df = pd.DataFrame({
+        "Grado":   ["1°",    "1°",    "2°",     "2°"],
+        "Espacio": ["Lengua", "Mate", "Lengua", "Mate"],
+        "Unidad":  ["U1",    "U2",    "U2",     "U3"],
+    })
+    return IndiceFacetas(df, COLUMNAS)
+
+
+def test_sin_filtros_ofrece_todo():
+    assert indice().opciones("Unidad") == ["U1", "U2", "U3"]
+
+
+def test_cascada_usa_la_mascara_combinada():
+    ind = indice()
+    filtros = {"Grado": ["1°"], "Espacio": ["Lengua"], "Unidad": []}
+    assert ind.opciones("Unidad", filtros) == ["U1"]
+    # Cada opción ofrecida da al menos una fila
+    for v in ind.opciones("Unidad", filtros):
+        assert ind.combinar({**filtros, "Unidad": [v]}).any()
+
+
+def test_cascada_solo_mira_columnas_anteriores():
+    ind = indice()
+    assert ind.opciones("Grado", {"Espacio": ["Lengua"], "Unidad": ["U3"]}) == ["1°", "2°"]
+    assert ind.opciones("Espacio", {"Grado": ["1°"], "Unidad": ["U3"]}) == ["Lengua", "Mate"]
+
+
+def test_conserva_lo_ya_elegido():
+    filtros = {"Grado": ["1°"], "Espacio": ["Lengua"], "Unidad": ["U3"]}
+    assert indice().opciones("Unidad", filtros) == ["U1", "U3"]
+
+
+def test_seleccion_desconocida_no_acota():
+    filtros = {"Grado": ["9°"], "Espacio": [], "Unidad": []}
+    assert indice().opciones("Unidad", filtros) == ["U1", "U2", "U3"]
+
+
+def test_combinar_y_conteos():
+    ind = indice()
+    assert ind.combinar({"Grado": [], "Espacio": []}) is None
+    mascara = ind.combinar({"Grado": ["1°", "2°"], "Espacio": ["Mate"]})
+    assert mascara.tolist() == [False, True, False, True]
+    base = np.array([True, True, True, False])
+    assert ind.combinar({"Espacio": ["Mate"]}, base).tolist() == [False, True, False, False]
+    assert base.tolist() == [True, True, True, False]
+    # La selección de la propia columna no cuenta
+    assert ind.conteos("Unidad", {"Grado": ["2°"], "Unidad": ["U1"]}) == {"U1": 0, "U2": 1, "U3": 1}
@@ -0,0 +1,105 @@
+"""``IndiceTexto`` contra una búsqueda de subcadenas por fuerza bruta."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from buscador.huellas import emparejar, huellas
+from buscador.indice_texto import IndiceTexto
+from buscador.normalizacion import normalizar
+
+PALABRAS = [
+    "Fracciones", "fracción", "decimales", "NUMERACIÓN", "números", "naturales", "año",
+    "multiplicación", "división", "de", "dos", "en", "(p.", "c.)", "ángulos", "Pingüino",
+]
+
+
+def textos(semilla, n=300):
+    azar = random.Random(semilla)
+    return [
+        None if azar.random() < 0.05 else " ".join(azar.choices(PALABRAS, k=azar.randint(1, 8)))
+        for _ in range(n)
+    ]
+
+
+def normalizados(crudos):
+    return [normalizar(t) if isinstance(t, str) else None for t in crudos]
+
+
+def fuerza_bruta(norm, termino):
+    termino = normalizar(termino)
+    return [i for i, t in enumerate(norm) if isinstance(t, str) and termino in t]
+
+
+TERMINOS = [
+    "fracc", "FRACCIÓN", "numeracion", "año", "ano", "de dos", "s de", "(p. c.)", ".", " ",
+    "iones deci", "xyz", "división ángulos", "n",
+]
+
+
+@pytest.fixture(scope="module")
+def columna():
+    return normalizados(textos(1))
+
+
+@pytest.mark.parametrize("termino", TERMINOS)
+def test_buscar(columna, termino):
+    assert IndiceTexto(columna).buscar(termino).tolist() == fuerza_bruta(columna, termino)
+
+
+@pytest.mark.parametrize("termino", TERMINOS)
+def test_buscar_incremental_tecla_a_tecla(columna, termino):
+    indice = IndiceTexto(columna)
+    previo = None
+    for i in range(1, len(termino) + 1):
+        parcial = termino[:i]
+        filas = indice.buscar_incremental(parcial, previo)
+        assert filas.tolist() == fuerza_bruta(columna, parcial), parcial
+        previo = (parcial, filas)
+
+
+def test_buscar_incremental_con_previo_que_no_es_prefijo(columna):
+    indice = IndiceTexto(columna)
+    previo = ("fracciones", indice.buscar("fracciones"))
+    assert indice.buscar_incremental("decimal", previo).tolist() == fuerza_bruta(columna, "decimal")
+
+
+def comparar(a, b):
+    assert a.textos == b.textos
+    assert a.vocabulario == b.vocabulario
+    for x, y in zip(a.postings, b.postings):
+        np.testing.assert_array_equal(x, y)
+    for x, y in zip(a.frecuencias, b.frecuencias):
+        np.testing.assert_array_equal(x, y)
+    for x, y in zip(a.pesos, b.pesos):
+        np.testing.assert_allclose(x, y, rtol=1e-6)
+    np.testing.assert_array_equal(a.longitudes, b.longitudes)
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_actualizar_igual_a_armar_de_cero(semilla):
+    azar = random.Random(semilla)
+    viejos = textos(semilla)
+    nuevos = list(viejos)
+    for _ in range(azar.randint(1, 40)):
+        i = azar.randrange(len(nuevos))
+        accion = azar.choice(["editar", "borrar", "insertar"])
+        if accion == "editar":
+            nuevos[i] = " ".join(azar.choices(PALABRAS, k=3))
+        elif accion == "borrar":
+            del nuevos[i]
+        else:
+            nuevos.insert(i, " ".join(azar.choices(PALABRAS, k=2)))
+    # Filas que solo cambian de lugar
+    bloque = nuevos[:50]
+    azar.shuffle(bloque)
+    nuevos[:50] = bloque
+
+    origen = emparejar(huellas(pd.DataFrame({"t": viejos})), huellas(pd.DataFrame({"t": nuevos})))
+    anterior = IndiceTexto(normalizados(viejos))
+    actualizado = anterior.actualizar(normalizados(nuevos), origen)
+    de_cero = IndiceTexto(normalizados(nuevos))
+    comparar(actualizado, de_cero)
+    for termino in ("fracc", "de dos", "numeracion"):
+        assert actualizado.buscar(termino).tolist() == de_cero.buscar(termino).tolist()
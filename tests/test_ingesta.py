@@ -0,0 +1,13 @@
+import json
+import os
+
+from buscador.ingesta import ESQUEMA, cargar_consolidado
+
+
+def test_hoja_copiada_se_guarda_una_vez(consolidado):
+    with open(os.path.join(consolidado, "consolidado.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    assert meta["duplicadas"] == ["Espacio de Comunicación.xlsx › Hoja1"]
+    df = cargar_consolidado(consolidado, archivo="Espacio de Comunicación").df
+    assert len(df) == 149
+    assert not df[ESQUEMA].duplicated().any()
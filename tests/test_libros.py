@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from buscador.libros import IndiceLibros, parsear
+
+
+@pytest.mark.parametrize("celda, registros", [
+    ("El gato sin botas 1, pp. 30, 124-125",
+     [("El gato sin botas 1", 30, 30), ("El gato sin botas 1", 124, 125)]),
+    ("Gira molinete 1, p. 156", [("Gira molinete 1", 156, 156)]),
+    ("Conexiones G1: p44/45, 50 a 55", [("Conexiones G1", 44, 45), ("Conexiones G1", 50, 55)]),
+    ("Matemática 6, pp. 146-7", [("Matemática 6", 146, 147)]),
+    ("Saber Hacer H5: Capítulo 3", [("Saber Hacer H5", None, None)]),
+    ("El gato sin botas 1, pp. 30\n\nGira molinete 1, p. 156",
+     [("El gato sin botas 1", 30, 30), ("Gira molinete 1", 156, 156)]),
+    ("", []),
+    (None, []),
+])
+def test_parsear(celda, registros):
+    assert parsear(celda) == registros
+
+
+# Celdas reales de la planilla publicada y de los libros por nivel
+@pytest.mark.parametrize("celda, registros", [
+    # "pp" sin punto
+    ("Ciencias Naturales. Destino ciencias 4, pp 11, 41",
+     [("Ciencias Naturales. Destino ciencias 4", 11, 11), ("Ciencias Naturales. Destino ciencias 4", 41, 41)]),
+    ("Ciencias Naturales. Destino ciencias 5, pp 70-81", [("Ciencias Naturales. Destino ciencias 5", 70, 81)]),
+    # Páginas sin "p." después de una coma o del número de tomo
+    ("Gira molinete 1, 112-113, 210-211", [("Gira molinete 1", 112, 113), ("Gira molinete 1", 210, 211)]),
+    ("Gira molinete 1 164-165", [("Gira molinete 1", 164, 165)]),
+    ("Geografía, historia y construcción de la ciudadanía 4, 132-149",
+     [("Geografía, historia y construcción de la ciudadanía 4", 132, 149)]),
+    # "p" pegada al título o al número
+    ("Conexiones G1_p47,", [("Conexiones G1", 47, 47)]),
+    ("Saber Hacer G5 p73,", [("Saber Hacer G5", 73, 73)]),
+    ("Español 2 El verbo p 55 a 75", [("Español 2 El verbo", 55, 75)]),
+    ("Conexiones789 Matemática 7, CAP1 Número natural", [("Conexiones789 Matemática 7", None, None)]),
+    ("Geografía Humana y económica: p18 a 25", [("Geografía Humana y económica", 18, 25)]),
+    ("Conexiones789 Matemática 9, pp.", [("Conexiones789 Matemática 9", None, None)]),
+    # Notas: no son libros
+    ("Las páginas que refieren a IVA van en el contenido de abajo", []),
+    ("Ver de las siguientes páginas cuáles refieren al contenido", []),
+    ("Libros de primero:", []),
+    ("Significado intuitivo de la multiplicación y la división: 227.", []),
+    ("Realizar/orientar su lectura", []),
+])
+def test_parsear_celdas_reales(celda, registros):
+    assert parsear(celda) == registros
+
+
+def test_indice_por_libro_y_paginas():
+    serie = pd.Series([
+        "Gira molinete 1, pp. 100-110",
+        "Gira Molinete 1, p. 150",
+        "El gato sin botas 1, pp. 30",
+        None,
+    ])
+    indice = IndiceLibros(serie)
+    assert indice.titulos() == ["El gato sin botas 1", "Gira Molinete 1"]
+    assert indice.filas("Gira molinete 1").tolist() == [0, 1]
+    assert indice.filas("Gira molinete 1", 105, 120).tolist() == [0]
+    assert indice.filas("Gira molinete 1", 111, 149).tolist() == []
+    assert indice.mascara(["El gato sin botas 1"], 1, 40).tolist() == [False, False, True, False]
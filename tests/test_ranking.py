@@ -0,0 +1,46 @@
+import numpy as np
+
+from buscador.ranking import ordenar_por_relevancia
+
+
+def arr(*valores, dtype=np.int32):
+    return np.array(valores, dtype=dtype)
+
+
+def puntajes(*valores):
+    return arr(*valores, dtype=np.float32)
+
+
+def test_mayor_puntaje_primero():
+    filas = arr(1, 4, 7)
+    assert ordenar_por_relevancia(filas, [(arr(1, 4, 7), puntajes(0.5, 2.0, 1.0))]).tolist() == [4, 7, 1]
+
+
+def test_empates_conservan_el_orden_de_la_planilla():
+    filas = arr(0, 2, 3, 5, 8)
+    orden = ordenar_por_relevancia(filas, [(filas, puntajes(1, 2, 1, 2, 1))])
+    assert orden.tolist() == [2, 5, 0, 3, 8]
+
+
+def test_filas_sin_puntaje_al_final_en_orden():
+    filas = arr(0, 1, 2, 3, 4)
+    orden = ordenar_por_relevancia(filas, [(arr(3), puntajes(0.1))])
+    assert orden.tolist() == [3, 0, 1, 2, 4]
+
+
+def test_campos_se_suman():
+    filas = arr(0, 1, 2)
+    contenido = (arr(0, 1), puntajes(1.0, 1.5))
+    rie = (arr(0, 2), puntajes(1.0, 1.2))
+    # 0: 2.0, 1: 1.5, 2: 1.2
+    assert ordenar_por_relevancia(filas, [contenido, rie]).tolist() == [0, 1, 2]
+
+
+def test_puntajes_de_filas_que_no_estan_se_ignoran():
+    filas = arr(2, 5)
+    orden = ordenar_por_relevancia(filas, [(arr(1, 5, 9), puntajes(9.0, 1.0, 9.0))])
+    assert orden.tolist() == [5, 2]
+
+
+def test_sin_filas():
+    assert ordenar_por_relevancia(arr(), [(arr(1), puntajes(1.0))]).tolist() == []
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from buscador.recursos import IndiceRecursos, parsear_fichas, parsear_videos
+
+
+@pytest.mark.parametrize("celda, recursos", [
+    ("Los números naturales_O", [("Los números naturales", "O")]),
+    ("Fracciones 2_E", [("Fracciones 2", "E")]),
+    ("Fracciones_2_O", [("Fracciones 2", "O")]),
+    ("Medidas_I_2", [("Medidas 2", "I")]),
+    ("Geometría O2", [("Geometría 2", "O")]),
+    ("Polígonos E.pdf", [("Polígonos", "E")]),
+    ("Líneas rectas_O  Curvas_I", [("Líneas rectas", "O"), ("Curvas", "I")]),
+    ("Fracciones_O\nDecimales_i", [("Fracciones", "O"), ("Decimales", "I")]),
+    # Fichas con guion bajo separadas por un solo espacio (celda real)
+    ("Líneas rectas, curvas y mixtas_O Líneas rectas, curvas y mixtas 2_O",
+     [("Líneas rectas, curvas y mixtas", "O"), ("Líneas rectas, curvas y mixtas 2", "O")]),
+    ("Medidas_I_2 Polígonos_E", [("Medidas 2", "I"), ("Polígonos", "E")]),
+    # "o" y "e" sueltas son palabras del título, no códigos
+    ("Suma o resta_O", [("Suma o resta", "O")]),
+    ("Ángulos e instrumentos E.pdf", [("Ángulos e instrumentos", "E")]),
+    ("Sin código", [("Sin código", None)]),
+    (None, []),
+])
+def test_parsear_fichas(celda, recursos):
+    assert parsear_fichas(celda) == recursos
+
+
+def test_parsear_videos():
+    assert parsear_videos("Fracciones\n(ver también)\n Decimales ") == [("Fracciones", "V"), ("Decimales", "V")]
+
+
+def test_mascara_por_tipo_y_titulo():
+    df = pd.DataFrame({
+        "Fichas": ["Fracciones_O", "Fracciones_E\nDecimales_I", None],
+        "Videolecciones": [None, None, "Fracciones"],
+    })
+    indice = IndiceRecursos(df, "Fichas", "Videolecciones")
+    assert indice.opciones() == ["Ficha informativa", "Ficha operativa", "Ficha estratégica", "Videolección"]
+    assert indice.mascara(("Ficha estratégica",)).tolist() == [False, True, False]
+    assert indice.mascara((), "fracc").tolist() == [True, True, True]
+    assert indice.mascara(("Videolección",), "fracc").tolist() == [False, False, True]
+    assert indice.mascara() is None
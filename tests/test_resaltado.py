@@ -0,0 +1,79 @@
+"""Tramos de resaltado: posiciones en UTF-16, como las usa ``String.slice`` en JavaScript."""
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from buscador.normalizacion import normalizar
+from buscador.resaltado import _origenes, buscador, tramos, tramos_de_pagina
+
+NODE = shutil.which("node")
+
+
+def cortar(texto, tramo):
+    """``texto.slice(inicio, fin)`` de JavaScript."""
+    inicio, fin = tramo
+    return texto.encode("utf-16-le")[2 * inicio:2 * fin].decode("utf-16-le")
+
+
+def resaltados(texto, *terminos):
+    patron = buscador([normalizar(t) for t in terminos])
+    return [cortar(texto, t) for t in tramos(texto, normalizar(texto), patron)]
+
+
+def test_origenes_cuentan_astrales_como_dos():
+    assert _origenes("😀a") == [0, 2, 3]
+
+
+def test_emoji_antes_de_la_coincidencia():
+    texto = "📚 Fracción 🧮 y fracciones"
+    assert tramos(texto, normalizar(texto), buscador(["fraccion"])) == [[3, 11], [17, 25]]
+    assert resaltados(texto, "fraccion") == ["Fracción", "fraccion"]
+
+
+def test_tildes_combinantes():
+    texto = "NUMERACIÓN y Pingüino"
+    assert resaltados(texto, "numeracion", "pinguino") == ["NUMERACIÓN", "Pingüino"]
+    # Una coincidencia que termina en la letra con tilde incluye la tilde
+    assert resaltados("canción", "cancio") == ["canció"]
+
+
+def test_enie_compuesta_y_descompuesta():
+    assert resaltados("El AÑO 😀 escolar", "año") == ["AÑO"]
+    assert resaltados("El Año escolar", "año") == ["Año"]
+
+
+def test_expansiones():
+    # ß -> ss, ﬁ -> fi: la coincidencia puede empezar o terminar dentro de un carácter
+    assert resaltados("🚗 Straße", "strasse") == ["Straße"]
+    assert resaltados("Straße", "ss") == ["ß"]
+    assert resaltados("😀ﬁcha", "ficha") == ["ﬁcha"]
+
+
+def test_sin_coincidencia_o_sin_texto():
+    patron = buscador(["zz"])
+    assert tramos("abc", "abc", patron) == []
+    assert tramos(None, None, patron) == []
+    assert tramos("abc", "abc", buscador([" "])) == []
+
+
+def test_tramos_de_pagina_en_json():
+    textos = ["😀 Año", None]
+    normalizados = [normalizar(textos[0]), None]
+    assert tramos_de_pagina(textos, normalizados, ["año"]) == ["[[3, 6]]", "[]"]
+
+
+@pytest.mark.skipif(NODE is None, reason="hace falta node")
+def test_slice_de_javascript():
+    casos = ["📚 Fracción 🧮 y fracciones", "NUMERACIÓN 😀", "El Año 🧒🏽 escolar", "🚗 Straße"]
+    terminos = ["fraccion", "numeracion", "año", "strasse"]
+    entrada = [[t, tramos(t, normalizar(t), buscador(terminos))] for t in casos]
+    programa = (
+        f"const entrada = {json.dumps(entrada)};\n"
+        "console.log(JSON.stringify(entrada.map(([t, ts]) => ts.map(([i, j]) => t.slice(i, j)))))"
+    )
+    salida = subprocess.run([NODE, "-e", programa], capture_output=True, text=True, check=True)
+    assert json.loads(salida.stdout) == [
+        ["Fracción", "fraccion"], ["NUMERACIÓN"], ["Año"], ["Straße"],
+    ]
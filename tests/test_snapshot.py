@@ -0,0 +1,111 @@
+"""``cargar_snapshot`` contra un servidor HTTP local que hace de planilla publicada."""
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from buscador.snapshot import cargar_snapshot
+
+CSV = "Grado,Contenidos\n1° grado,Fracciones\n2° grado,Números naturales\n".encode("utf-8")
+
+
+class Planilla:
+    """Estado del servidor: cuerpo, código de error forzado y pedidos recibidos."""
+
+    def __init__(self):
+        self.cuerpo = CSV
+        self.error = None
+        self.pedidos = []
+
+    @property
+    def etag(self):
+        return '"' + hashlib.sha1(self.cuerpo).hexdigest() + '"'
+
+
+@pytest.fixture
+def planilla():
+    estado = Planilla()
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            estado.pedidos.append(dict(self.headers))
+            if estado.error:
+                self.send_error(estado.error)
+                return
+            if self.headers.get("If-None-Match") == estado.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv; charset=utf-8")
+            self.send_header("ETag", estado.etag)
+            self.send_header("Content-Length", str(len(estado.cuerpo)))
+            self.end_headers()
+            self.wfile.write(estado.cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    estado.url = f"http://127.0.0.1:{servidor.server_address[1]}/hoja.csv"
+    yield estado
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def cargar(planilla, tmp_path, max_edad=0):
+    return cargar_snapshot(planilla.url, str(tmp_path), max_edad=max_edad, timeout=5)
+
+
+def test_primera_descarga(planilla, tmp_path):
+    s = cargar(planilla, tmp_path)
+    assert s.origen == "red"
+    assert s.etag == planilla.etag
+    assert list(s.df["Contenidos"]) == ["Fracciones", "Números naturales"]
+    assert "If-None-Match" not in planilla.pedidos[0]
+
+
+def test_dentro_de_max_edad_no_consulta_la_red(planilla, tmp_path):
+    cargar(planilla, tmp_path)
+    s = cargar(planilla, tmp_path, max_edad=3600)
+    assert s.origen == "disco"
+    assert len(planilla.pedidos) == 1
+
+
+def test_304_usa_la_copia_local(planilla, tmp_path):
+    primero = cargar(planilla, tmp_path)
+    s = cargar(planilla, tmp_path)
+    assert planilla.pedidos[1]["If-None-Match"] == planilla.etag
+    assert s.origen == "disco"
+    assert s.version == primero.version
+    assert s.validado >= primero.validado
+    assert s.df.equals(primero.df)
+
+
+def test_500_sigue_con_la_copia_local(planilla, tmp_path):
+    primero = cargar(planilla, tmp_path)
+    planilla.error = 500
+    s = cargar(planilla, tmp_path)
+    assert s.origen == "obsoleto"
+    assert s.version == primero.version
+    assert s.df.equals(primero.df)
+
+
+def test_500_sin_copia_local_falla(planilla, tmp_path):
+    planilla.error = 500
+    with pytest.raises(OSError):
+        cargar(planilla, tmp_path)
+
+
+def test_cambio_de_contenido(planilla, tmp_path):
+    primero = cargar(planilla, tmp_path)
+    planilla.cuerpo = CSV + "3° grado,Decimales\n".encode("utf-8")
+    s = cargar(planilla, tmp_path)
+    assert s.origen == "red"
+    assert s.version != primero.version
+    assert list(s.df["Contenidos"])[-1] == "Decimales"
+    # Y la versión nueva queda en disco
+    assert cargar(planilla, tmp_path, max_edad=3600).version == s.version